@@ -0,0 +1,21 @@
+""" 用项目自己的 Evaluator 重新生成翻前胜率表 (需要numpy) """
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.components.helper import Helper
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the 169x169 preflop equity table.")
+    parser.add_argument("--trials", type=int, default=Helper.PREFLOP_TABLE_TRIALS, help="simulations per matchup")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=Helper.PREFLOP_TABLE_PATH)
+    args = parser.parse_args()
+    Helper.build_preflop_table(trials=args.trials, seed=args.seed, path=args.output, verbose=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+""" 多牌桌压力测试: 随机策略的机器人在一个进程里同时进行多张牌桌 """
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.dealer import Dealer
+from src.farm import FarmStats, TableFarm
+from src.gamer import BotPlayer, RandomStrategy
+
+
+def report(stats: FarmStats):
+    print(f"{stats.hands:>10} hands  {stats.hands_per_second:>10.0f} hands/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many headless bot tables in one process.")
+    parser.add_argument("--tables", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=6, help="bots per table")
+    parser.add_argument("--hands", type=int, default=100, help="hands per table")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    strategy = RandomStrategy(seed=args.seed)
+    dealers = [Dealer([BotPlayer(f"bot{table}_{seat}", strategy) for seat in range(args.players)],
+                      headless=True, table=table)
+               for table in range(args.tables)]
+    stats = TableFarm(dealers, args.hands, progress=report).run()
+    report(stats)
+    print(f"{stats.decisions} decisions in {stats.seconds:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,8 +2,12 @@ from .action import Action
 from .card import Card
 from .lookup_table import LOOKUP_TABLE
 from .evaluator import Evaluator
+from .isomorphism import SuitIsomorphism
+from .hand_range import HandRange
+from .outs import OutsAnalyzer, OutsReport
+from .strength import HandStrength, StrengthResult
 from .hand import Deck, Hand
 from .move import Move
 from .position import Position
-from .pot import Pot
+from .pot import Pot, PotResult
 from .street import Street
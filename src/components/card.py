@@ -28,7 +28,8 @@ SOFTWARE.
 
 
 from __future__ import annotations
-from typing import Iterable
+from types import MappingProxyType
+from typing import Iterable, Mapping
 import math
 
 
@@ -103,6 +104,14 @@ class Card(int):
         8: "♣",  # clubs
     }
 
+    # the 52 canonical cards, filled in right after the class body.
+    # dense index = rank * 4 + position of the suit in INDEX_SUITS
+    INDEX_SUITS = "♥♦♣♠"
+    CARDS: tuple[Card, ...] = ()
+    STR_TO_CARD: Mapping[str, Card] = MappingProxyType({})
+    INT_TO_INDEX: Mapping[int, int] = MappingProxyType({})
+    _PRETTY_TO_CARD: dict[str, Card] = {}
+
     def __new__(cls, suit_char, rank_char) -> Card:
         return Card.from_string(suit_char, rank_char)
 
@@ -122,6 +131,9 @@ class Card(int):
         Returns:
             Card: The 32-bit int representing the card as described above
         """
+        card = Card._PRETTY_TO_CARD.get(suit_char + rank_char)
+        if card is not None:
+            return card
 
         rank_int = Card.CHAR_RANK_TO_INT_RANK[rank_char]
         suit_int = Card.CHAR_SUIT_TO_INT_SUIT[suit_char]
@@ -148,8 +160,65 @@ class Card(int):
             Card: The 32-bit int representing the card as described above
 
         """
+        index = Card.INT_TO_INDEX.get(card_int)
+        if index is not None:
+            return Card.CARDS[index]
         return super(Card, cls).__new__(cls, card_int)
 
+    @staticmethod
+    def from_index(index: int) -> Card:
+        """
+        Looks up a canonical card by its dense index.
+
+        Args:
+            index (int): A number between 0-51 (see :attr:`Card.index`).
+        Returns:
+            Card: The canonical card instance.
+
+        """
+        return Card.CARDS[index]
+
+    @staticmethod
+    def int_to_index(card_int: int) -> int:
+        """
+        Args:
+            card_int (int): A well-formed card int.
+        Returns:
+            int: The dense index of the card, between 0-51.
+
+        """
+        return Card.INT_TO_INDEX[card_int]
+
+    @staticmethod
+    def cards_to_mask(cards: Iterable[int]) -> int:
+        """
+        Args:
+            cards (Iterable[int]): Card ints.
+        Returns:
+            int: A 52-bit mask with the bit of each card's dense index set.
+
+        """
+        mask = 0
+        for card in cards:
+            mask |= 1 << Card.INT_TO_INDEX[card]
+        return mask
+
+    @staticmethod
+    def mask_to_cards(mask: int) -> list[Card]:
+        """
+        Args:
+            mask (int): A 52-bit mask of dense card indices.
+        Returns:
+            List[Card]: The canonical cards whose bits are set, in index order.
+
+        """
+        cards = []
+        while mask:
+            low = mask & -mask
+            cards.append(Card.CARDS[low.bit_length() - 1])
+            mask ^= low
+        return cards
+
     def __str__(self) -> str:
         """
         Translates card into a readable string.
@@ -166,6 +235,24 @@ class Card(int):
     def __repr__(self) -> str:
         return self.__str__()
 
+    def __reduce__(self):
+        # 使Card可以被pickle (例如传给子进程), __new__ 需要的是花色和点数字符
+        return Card.from_int, (int(self),)
+
+    @property
+    def index(self) -> int:
+        """
+        The dense index of the card, used by arrays and bitmasks.
+
+        Example:
+            "\u2665" "2" --> 0, "\u2660" "A" --> 51
+
+        Returns:
+            int: Number between 0-51, equal to rank * 4 + suit position in ``INDEX_SUITS``.
+
+        """
+        return Card.INT_TO_INDEX[self]
+
     @property
     def rank(self) -> int:
         """
@@ -264,15 +351,12 @@ class Card(int):
     def card_strings_to_int(card_strs: Iterable[str]) -> list[Card]:
         """
         Args:
-            card_strs (Iterable[str]): An iterable of card strings.
+            card_strs (Iterable[str]): An iterable of card strings, e.g. "\u2660A" or "As".
         Returns:
             List[Card]: The cards in the corresponding int format.
 
         """
-        bhand = []
-        for card_str in card_strs:
-            bhand.append(Card(card_str[0],card_str[1]))
-        return bhand
+        return [Card.STR_TO_CARD[card_str] for card_str in card_strs]
 
     @staticmethod
     def prime_product_from_hand(cards: Iterable[Card]) -> int:
@@ -335,9 +419,20 @@ class Card(int):
         return " ".join(card.pretty_string for card in cards)
 
 
+Card.CARDS = tuple(Card.from_string(suit, rank) for rank in Card.STR_RANKS for suit in Card.INDEX_SUITS)
+# from_string 只接受花色在前的形式, 参数颠倒时 (如 Card('A', 's')) 不能匹配到ascii形式
+Card._PRETTY_TO_CARD = {str(card): card for card in Card.CARDS}
+# both the pretty form "\u2660A" and the ascii form "As"
+Card.STR_TO_CARD = MappingProxyType({**Card._PRETTY_TO_CARD,
+                                     **{Card.STR_RANKS[card.rank] + Card.INT_SUIT_TO_CHAR_SUIT[card.suit]: card
+                                        for card in Card.CARDS}})
+Card.INT_TO_INDEX = MappingProxyType({int(card): i for i, card in enumerate(Card.CARDS)})
+
+
 if __name__ == '__main__':
     c = Card('♠', "T")
     d = Card('♠', "J")
     l = [c, d]
     l.sort(reverse=True)
     print(l)
+
@@ -25,6 +25,8 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 import itertools
+import math
+from typing import Optional
 
 from src.components import Card, LOOKUP_TABLE
 
@@ -34,6 +36,22 @@ class Evaluator:
     牌力判断
     Evaluates hand strengths with optimizations in terms of speed and memory usage.
     """
+    # 花色计数器: 每种花色占4个比特，初始值为3，某一花色凑够5张时该段最高位置1
+    SUIT_COUNTER_INIT = 0x3333
+    SUIT_COUNTER_FLUSH = 0x8888
+    SUIT_TO_COUNTER = (0, 1 << 0, 1 << 4, 0, 1 << 8, 0, 0, 0, 1 << 12)
+    FLUSH_BIT_TO_SUIT = {1 << 3: 0x1000, 1 << 7: 0x2000, 1 << 11: 0x4000, 1 << 15: 0x8000}
+
+    # evaluate_batch 使用的numpy查找表, 第一次调用时创建
+    _batch_tables = None
+    # 牌力 -> 按重要程度排列的5个点数 / 文字描述, 第一次调用 decode 或 describe 时创建
+    _rank_to_ranks: Optional[tuple[tuple[int, ...], ...]] = None
+    _rank_to_description: Optional[tuple[str, ...]] = None
+
+    RANK_NAMES = ("Two", "Three", "Four", "Five", "Six", "Seven", "Eight",
+                  "Nine", "Ten", "Jack", "Queen", "King", "Ace")
+    RANK_PLURALS = tuple(name + "es" if name.endswith("x") else name + "s" for name in RANK_NAMES)
+
     @staticmethod
     def evaluate(cards: list[Card], board: list[Card])-> tuple[int, str, list[Card]]:
         """ Combine functions
@@ -73,6 +91,131 @@ class Evaluator:
         prime = Card.prime_product_from_hand(cards)
         return LOOKUP_TABLE.unsuited_lookup[prime]
 
+    @staticmethod
+    def _seven(cards: list[Card]) -> int:
+        """
+        Performs an evaluation of 5, 6 or 7 cards in a single pass, mapping them to
+        the rank of the best 5 card subset.
+
+        Flushes are detected by counting suits, the rank multiset is looked up
+        by its prime product, no 5 card combination is built.
+
+        Args:
+            cards (list[Card]): A list of 5, 6 or 7 card ints.
+        Returns:
+            int: The rank of the best 5 card hand.
+
+        """
+        prime = 1
+        counter = Evaluator.SUIT_COUNTER_INIT
+        for card in cards:
+            prime *= card & 0x3F
+            counter += Evaluator.SUIT_TO_COUNTER[(card >> 12) & 0xF]
+
+        # 7张牌中最多只有一种花色能凑够5张, 此时同花一定是最大的牌型
+        if counter & Evaluator.SUIT_COUNTER_FLUSH:
+            suit = Evaluator.FLUSH_BIT_TO_SUIT[counter & Evaluator.SUIT_COUNTER_FLUSH]
+            prime = math.prod(card & 0x3F for card in cards if card & suit)
+            return LOOKUP_TABLE.flush_lookup[prime]
+
+        return LOOKUP_TABLE.unsuited_lookup[prime]
+
+    @staticmethod
+    def get_partial_state(cards: list[Card]) -> tuple[int, int]:
+        """
+        Evaluates the part of a hand shared by several evaluations (e.g. the board
+        or a player's hole cards) once.
+
+        Args:
+            cards (list[Card]): A list of card ints.
+        Returns:
+            tuple[int, int]: The prime product and the suit counter of the cards.
+
+        """
+        prime = 1
+        counter = 0
+        for card in cards:
+            prime *= card & 0x3F
+            counter += Evaluator.SUIT_TO_COUNTER[(card >> 12) & 0xF]
+        return prime, counter
+
+    @staticmethod
+    def merge_states(state: tuple[int, int], other: tuple[int, int]) -> tuple[int, int]:
+        """
+        Merges the partial states of two disjoint sets of cards.
+
+        """
+        return state[0] * other[0], state[1] + other[1]
+
+    @staticmethod
+    def _seven_from_states(cards: list[Card],
+                           state: tuple[int, int],
+                           board: list[Card],
+                           board_state: tuple[int, int]) -> int:
+        """
+        Same as :meth:`_seven` for cards + board, given their partial states
+        from :meth:`get_partial_state`. The cards are only read for flushes.
+
+        """
+        counter = state[1] + board_state[1] + Evaluator.SUIT_COUNTER_INIT
+        if counter & Evaluator.SUIT_COUNTER_FLUSH:
+            suit = Evaluator.FLUSH_BIT_TO_SUIT[counter & Evaluator.SUIT_COUNTER_FLUSH]
+            prime = math.prod(card & 0x3F for card in itertools.chain(cards, board) if card & suit)
+            return LOOKUP_TABLE.flush_lookup[prime]
+
+        return LOOKUP_TABLE.unsuited_lookup[state[0] * board_state[0]]
+
+    @staticmethod
+    def get_hand_rank(cards: list[Card], board: list[Card]) -> int:
+        """
+        Evaluates the rank of the best five-card hand without building the combination.
+
+        Args:
+            cards (list[int]): A list of length two of card ints that a player holds.
+            board (list[int]): A list of length 3, 4, or 5 of card ints.
+        Returns:
+            int: A number between 1 (highest) and 7462 (lowest) representing the relative
+                hand rank of the given card.
+
+        """
+        return Evaluator._seven(cards + board)
+
+    @staticmethod
+    def rank_hands(hands: list[list[Card]], board: list[Card]) -> list[int]:
+        """
+        Evaluates several hands on one shared board, e.g. every player at a
+        showdown. The board's prime product, suit counter and per-suit flush
+        products are computed once, each hand only adds its own cards.
+
+        Args:
+            hands (list[list[Card]]): The hole cards of each player.
+            board (list[Card]): A list of length 3, 4, or 5 of card ints.
+        Returns:
+            list: The rank of each hand, in the same order.
+
+        """
+        board_prime, board_counter = Evaluator.get_partial_state(board)
+        board_counter += Evaluator.SUIT_COUNTER_INIT
+        flush_lookup, unsuited_lookup = LOOKUP_TABLE.flush_lookup, LOOKUP_TABLE.unsuited_lookup
+        suit_primes = {suit: math.prod(card & 0x3F for card in board if card & suit)
+                       for suit in Evaluator.FLUSH_BIT_TO_SUIT.values()}
+        ranks = []
+        for cards in hands:
+            prime, counter = board_prime, board_counter
+            for card in cards:
+                prime *= card & 0x3F
+                counter += Evaluator.SUIT_TO_COUNTER[(card >> 12) & 0xF]
+            if counter & Evaluator.SUIT_COUNTER_FLUSH:
+                suit = Evaluator.FLUSH_BIT_TO_SUIT[counter & Evaluator.SUIT_COUNTER_FLUSH]
+                flush_prime = suit_primes[suit]
+                for card in cards:
+                    if card & suit:
+                        flush_prime *= card & 0x3F
+                ranks.append(flush_lookup[flush_prime])
+            else:
+                ranks.append(unsuited_lookup[prime])
+        return ranks
+
     @staticmethod
     def calculate(cards: list[Card], board: list[Card]) -> tuple[int, list[Card]]:
         """
@@ -89,11 +232,164 @@ class Evaluator:
 
         """
         all_cards = cards + board
-        # 生成(评分, hand)元组的列表
-        hands_with_scores = [(Evaluator._five(hand), hand) for hand in itertools.combinations(all_cards, 5)] # type: ignore
-        # 找到评分最低的元组
-        hand_rank, best_hand = min(hands_with_scores)
-        return hand_rank, best_hand # type: ignore
+        hand_rank = Evaluator._seven(all_cards)
+        return hand_rank, Evaluator.get_best_combo(all_cards, hand_rank)
+
+    @staticmethod
+    def evaluate_batch(hole, board):
+        """
+        Evaluates N independent hands at once with vectorized array operations.
+        Requires numpy.
+
+        Args:
+            hole (ndarray[N, 2]): The card ints that each player holds.
+            board (ndarray[N, k]): The card ints of each board, k in 3, 4, 5.
+        Returns:
+            ndarray[N]: The rank of the best five-card hand of each row.
+
+        """
+        import numpy as np
+
+        if Evaluator._batch_tables is None:
+            Evaluator._batch_tables = tuple(
+                np.frombuffer(a, dtype=np.int64 if a.typecode == "q" else np.uint16).astype(np.int64)
+                for a in LOOKUP_TABLE.export_arrays())
+        flush_keys, flush_ranks, unsuited_keys, unsuited_ranks = Evaluator._batch_tables
+
+        cards = np.concatenate([np.asarray(hole, dtype=np.int64),
+                                np.asarray(board, dtype=np.int64)], axis=1)
+        if not 5 <= cards.shape[1] <= 7:
+            raise ValueError(f"Can only evaluate 5 to 7 cards, {cards.shape[1]} found.")
+        primes = cards & 0x3F
+        # 与 _seven 相同的花色计数器, 按行求和
+        counts = np.asarray(Evaluator.SUIT_TO_COUNTER, dtype=np.int64)[(cards >> 12) & 0xF]
+        flush_bits = (counts.sum(axis=1) + Evaluator.SUIT_COUNTER_INIT) & Evaluator.SUIT_COUNTER_FLUSH
+        flush = flush_bits != 0
+
+        ranks = unsuited_ranks[np.searchsorted(unsuited_keys, primes.prod(axis=1))]
+        if flush.any():
+            # 同花掩码: 只保留凑够5张的那一种花色的牌
+            suited = (counts[flush] << 3) == flush_bits[flush, None]
+            product = np.where(suited, primes[flush], 1).prod(axis=1)
+            ranks[flush] = flush_ranks[np.searchsorted(flush_keys, product)]
+        return ranks
+
+    @staticmethod
+    def get_best_combo(cards: list[Card], hand_rank: int) -> list[Card]:
+        """
+        Rebuilds the best five-card combination of a known hand rank from the
+        decoded ranks, without evaluating any 5 card subset.
+
+        Args:
+            cards (list[Card]): A list of 5, 6 or 7 card ints.
+            hand_rank (int): The rank of the cards given by :meth:`get_hand_rank`
+        Returns:
+            list: The best cards combination, ordered as :meth:`decode`.
+
+        """
+        ranks = Evaluator.decode(hand_rank)
+        if LOOKUP_TABLE.RANK_TO_CLASS[hand_rank] in (1, 4):
+            # 同花的5张牌都来自凑够5张的那种花色
+            suits = [card & 0xF000 for card in cards]
+            suit = max(set(suits), key=suits.count)
+            by_rank = {(card >> 8) & 0xF: card for card in cards if card & suit}
+            combo = [by_rank.get(rank) for rank in ranks]
+        else:
+            left = list(cards)
+            combo = []
+            for rank in ranks:
+                card = next((card for card in left if (card >> 8) & 0xF == rank), None)
+                if card is not None:
+                    left.remove(card)
+                combo.append(card)
+        if None in combo:
+            raise ValueError(f"No combination of {cards} has rank {hand_rank}")
+        return combo  # type: ignore
+
+    @staticmethod
+    def _build_rank_tables() -> None:
+        """ 枚举所有5张牌的点数组合, 记下每个牌力对应的点数和描述 """
+        rank_to_ranks: list[tuple[int, ...]] = [()] * (LOOKUP_TABLE.MAX_HIGH_CARD + 1)
+        for ranks in itertools.combinations_with_replacement(range(12, -1, -1), 5):
+            if max(ranks.count(rank) for rank in ranks) > 4:
+                continue
+            prime = math.prod(Card.PRIMES[rank] for rank in ranks)
+            # 张数多的在前, 同样张数的点数大的在前, A-5 顺子的 A 在最后
+            ordered = tuple(sorted(ranks, key=lambda rank: (ranks.count(rank), rank), reverse=True))
+            if ordered == (12, 3, 2, 1, 0):
+                ordered = (3, 2, 1, 0, 12)
+            rank_to_ranks[LOOKUP_TABLE.unsuited_lookup[prime]] = ordered
+            if len(set(ranks)) == 5:
+                rank_to_ranks[LOOKUP_TABLE.flush_lookup[prime]] = ordered
+        Evaluator._rank_to_ranks = tuple(rank_to_ranks)
+        Evaluator._rank_to_description = ("",) + tuple(
+            Evaluator._describe(LOOKUP_TABLE.RANK_TO_CLASS[rank], rank_to_ranks[rank])
+            for rank in range(1, LOOKUP_TABLE.MAX_HIGH_CARD + 1))
+
+    @staticmethod
+    def _describe(rank_class: int, ranks: tuple[int, ...]) -> str:
+        names, plurals = Evaluator.RANK_NAMES, Evaluator.RANK_PLURALS
+
+        def kickers(rest: tuple[int, ...]) -> str:
+            short = "-".join(Card.STR_RANKS[rank] for rank in rest)
+            return f"{short} kicker" if len(rest) == 1 else f"{short} kickers"
+
+        first = ranks[0]
+        if rank_class == 1:
+            return "Royal Flush" if first == 12 else f"Straight Flush, {names[first]} high"
+        if rank_class == 2:
+            return f"Four {plurals[first]}, {kickers(ranks[4:])}"
+        if rank_class == 3:
+            return f"{plurals[first]} full of {plurals[ranks[3]]}"
+        if rank_class == 4:
+            return f"Flush, {'-'.join(Card.STR_RANKS[rank] for rank in ranks)}"
+        if rank_class == 5:
+            return f"Straight, {names[first]} high"
+        if rank_class == 6:
+            return f"Three {plurals[first]}, {kickers(ranks[3:])}"
+        if rank_class == 7:
+            return f"Two Pair, {plurals[first]} and {plurals[ranks[2]]}, {kickers(ranks[4:])}"
+        if rank_class == 8:
+            return f"Pair of {plurals[first]}, {kickers(ranks[2:])}"
+        return f"{names[first]} high, {'-'.join(Card.STR_RANKS[rank] for rank in ranks[1:])}"
+
+    @staticmethod
+    def decode(hand_rank: int) -> tuple[int, ...]:
+        """
+        Decodes a hand rank back into the ranks of its five cards, without
+        looking at the cards.
+
+        Example:
+            Pair of Kings with A-Q-9 -> (11, 11, 12, 10, 7)
+
+        Args:
+            hand_rank (int): The rank of the hand given by :meth:`evaluate`
+        Returns:
+            tuple: Five rank ints (0 is a deuce, 12 an ace), the made part first,
+                then the kickers, each part from high to low.
+
+        """
+        if Evaluator._rank_to_ranks is None:
+            Evaluator._build_rank_tables()
+        return Evaluator._rank_to_ranks[hand_rank]  # type: ignore
+
+    @staticmethod
+    def describe(hand_rank: int) -> str:
+        """
+        Returns a detailed description of the hand of the hand_rank, including kickers.
+
+        Example:
+            3548 -> "Pair of Kings, A-Q-9 kickers"
+
+        Args:
+            hand_rank (int): The rank of the hand given by :meth:`evaluate`
+        Returns:
+            string: A human-readable description of the five cards.
+
+        """
+        if Evaluator._rank_to_description is None:
+            Evaluator._build_rank_tables()
+        return Evaluator._rank_to_description[hand_rank]  # type: ignore
 
     @staticmethod
     def get_rank_class(hand_rank: int) -> int:
@@ -109,9 +405,43 @@ class Evaluator:
                 Example, straight flush is class 1, high card is class 9, full house is class 3.
 
         """
-        max_rank = min(
-            rank for rank in LOOKUP_TABLE.MAX_TO_RANK_CLASS if hand_rank <= rank)
-        return LOOKUP_TABLE.MAX_TO_RANK_CLASS[max_rank]
+        return LOOKUP_TABLE.RANK_TO_CLASS[hand_rank]
+
+    @staticmethod
+    def get_rank_classes(hand_ranks):
+        """
+        Vectorized :meth:`get_rank_class`. Requires numpy.
+
+        Args:
+            hand_ranks (ndarray): Hand ranks of any shape.
+        Returns:
+            ndarray[uint8]: The rank class of each hand rank, in the same shape.
+
+        """
+        import numpy as np
+
+        return np.frombuffer(LOOKUP_TABLE.RANK_TO_CLASS, dtype=np.uint8)[np.asarray(hand_ranks)]
+
+    @staticmethod
+    def rank_class_histogram(hand_ranks):
+        """
+        Counts the hand ranks of each rank class without building a class per rank.
+        Requires numpy. Histograms of several chunks can simply be added up.
+
+        Args:
+            hand_ranks (ndarray): Hand ranks of any shape.
+        Returns:
+            ndarray[int64]: 10 counts indexed by rank class, index 0 is always 0.
+
+        """
+        import numpy as np
+
+        counts = np.bincount(np.asarray(hand_ranks).ravel(), minlength=LOOKUP_TABLE.MAX_HIGH_CARD + 1)
+        if len(counts) > LOOKUP_TABLE.MAX_HIGH_CARD + 1 or counts[0]:
+            raise ValueError(f"Hand ranks must be between 1 and {LOOKUP_TABLE.MAX_HIGH_CARD}.")
+        # 每个牌型的牌力是连续的一段, 按段求和即可
+        starts = [0, 1] + [max_rank + 1 for max_rank in sorted(LOOKUP_TABLE.MAX_TO_RANK_CLASS)[:-1]]
+        return np.add.reduceat(counts, starts).astype(np.int64)
 
     @staticmethod
     def rank_to_string(hand_rank: int) -> str:
@@ -127,7 +457,7 @@ class Evaluator:
             string: A human-readable string of the hand rank (i.e. Flush, Ace High).
 
         """
-        return LOOKUP_TABLE.RANK_CLASS_TO_STRING[Evaluator.get_rank_class(hand_rank)]
+        return LOOKUP_TABLE.RANK_TO_STRING[hand_rank]
 
     @staticmethod
     def get_five_card_rank_percentage(hand_rank: int) -> float:
@@ -1,7 +1,7 @@
 """ 定义纸牌Card、手牌Hand、一副牌Deck类 """
 
 import random
-import itertools
+from typing import Iterable, Optional
 
 
 from src.components import Card
@@ -10,17 +10,103 @@ from src.components import Card
 Hand = list[Card]
 
 class Deck:
-    """ 一副完整的牌 (特殊的手牌) """
+    """
+    一副牌 (特殊的手牌)
+    52张牌预先生成一次, 每副牌只保存一个牌的排列和剩余牌的位掩码:
+    位置 [0, size) 是还没发出的牌, [size, live) 是已经发出的牌, [live, 52) 是死牌。
+    随机发牌、移除死牌都是 O(1), reset 只恢复两个计数, 不分配内存
+    """
     SUITS: tuple = ('♥', '♦', '♣', '♠')
     RANKS: tuple = ('2', '3', '4', '5', '6','7',
                     '8', '9', 'T', 'J', 'Q', 'K', 'A')
-    def __init__(self) -> None:
-        self._cards = [Card(s, r) for s, r
-                       in itertools.product(Deck.SUITS, Deck.RANKS)]
-        random.shuffle(self._cards)
+    # 位掩码的第i位对应下标为i的牌 (见 Card.index)
+    CARDS = Card.CARDS
+    INDEX = Card.INT_TO_INDEX
+    FULL_MASK = (1 << len(CARDS)) - 1
 
-    def pop(self,):
-        return self._cards.pop()
+    def __init__(self,
+                 rng: Optional[random.Random] = None,
+                 dead: Iterable[Card] = ()) -> None:
+        """
+        @args:
+            rng: 发牌用的随机数发生器, 默认使用全局的random
+            dead: 不会被发出的牌 (已知的牌或死牌), reset 后仍然保持
+        """
+        self._random = (rng or random).random
+        self._cards = list(Deck.CARDS)
+        self._positions = list(range(len(Deck.CARDS)))
+        self._live = self._size = len(Deck.CARDS)
+        self._live_mask = self._mask = Deck.FULL_MASK
+        for card in dead:
+            self.remove(card)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, card: int) -> bool:
+        return bool(self._mask >> Deck.INDEX[card] & 1)
+
+    @property
+    def mask(self) -> int:
+        """ 剩余牌的位掩码 """
+        return self._mask
+
+    def pop(self,) -> Card:
+        """ 随机发一张牌 """
+        size = self._size - 1
+        if size < 0:
+            raise IndexError("pop from an empty deck")
+        i = int(self._random() * self._size)
+        cards, positions = self._cards, self._positions
+        card = cards[i]
+        # 把发出的牌换到剩余区域的末尾
+        cards[i], cards[size] = cards[size], card
+        positions[Deck.INDEX[cards[i]]] = i
+        positions[Deck.INDEX[card]] = size
+        self._size = size
+        self._mask ^= 1 << Deck.INDEX[card]
+        return card
+
+    def draw(self, number: int) -> list[Card]:
+        """ 随机发 number 张牌 """
+        return [self.pop() for _ in range(number)]
+
+    def remove(self, card: Card):
+        """ 把一张牌标记为死牌, 无论它是否已经发出 """
+        index = Deck.INDEX[card]
+        position = self._positions[index]
+        if position >= self._live:
+            return
+        if position < self._size:
+            # 还没发出: 先换到剩余区域的末尾
+            self._size -= 1
+            self._swap(position, self._size)
+            self._mask ^= 1 << index
+            position = self._size
+        self._live -= 1
+        self._swap(position, self._live)
+        self._live_mask ^= 1 << index
+
+    def reset(self, dead: Optional[Iterable[Card]] = None):
+        """ 收回所有发出的牌; 给定 dead 时重新指定死牌, 否则保留原来的死牌 """
+        if dead is not None:
+            self._live = len(Deck.CARDS)
+            self._live_mask = Deck.FULL_MASK
+        self._size = self._live
+        self._mask = self._live_mask
+        if dead is not None:
+            for card in dead:
+                self.remove(card)
+
+    def remaining(self) -> list[Card]:
+        """ 还没发出的牌 """
+        return self._cards[:self._size]
+
+    def _swap(self, i: int, j: int):
+        cards, positions = self._cards, self._positions
+        cards[i], cards[j] = cards[j], cards[i]
+        positions[Deck.INDEX[cards[i]]] = i
+        positions[Deck.INDEX[cards[j]]] = j
 
 
 if __name__ == '__main__':
@@ -0,0 +1,139 @@
+""" 手牌范围: 解析 "QQ+, AKs, A5s-A2s, KQo:0.5" 这样的范围写法, 得到带权重的组合 """
+
+import itertools
+import re
+from typing import Iterable, Iterator, Optional
+
+from src.components import Card
+
+
+Combo = tuple[Card, Card]
+
+
+class HandRange:
+    """
+    A weighted set of two-card combos.
+
+    Each combo is stored once, with the card of the higher dense index first.
+    Later tokens of a range string override the weight of earlier ones.
+
+    """
+    RANKS = Card.STR_RANKS
+    SUITS = "shdc"
+    _TOKEN = re.compile(r"^([2-9TJQKA])([2-9TJQKA])([so]?)(\+?)"
+                        r"(?:-([2-9TJQKA])([2-9TJQKA])([so]?))?$")
+    _COMBO = re.compile(r"^([2-9TJQKA][shdc])([2-9TJQKA][shdc])$")
+
+    def __init__(self, combos: Optional[dict[Combo, float]] = None) -> None:
+        self.combos: dict[Combo, float] = combos or {}
+
+    def __len__(self) -> int:
+        return len(self.combos)
+
+    def __iter__(self) -> Iterator[tuple[Combo, float]]:
+        return iter(self.combos.items())
+
+    def __repr__(self) -> str:
+        return f"HandRange({len(self.combos)} combos, weight={self.total_weight():g})"
+
+    def total_weight(self) -> float:
+        return sum(self.combos.values())
+
+    @staticmethod
+    def combo(first: Card, second: Card) -> Combo:
+        """ 组合的规范形式: 下标大的牌在前 """
+        return (first, second) if first.index > second.index else (second, first)
+
+    @staticmethod
+    def parse(text: str) -> "HandRange":
+        """
+        Parses a range string.
+
+        Supported tokens, separated by commas or spaces, each with an optional ``:weight``:
+            pairs           "QQ", "QQ+", "QQ-88"
+            suited/offsuit  "AKs", "AKo", "AK" (both), "ATs+", "A5s-A2s"
+            single combos   "AsKs"
+
+        Args:
+            text (str): The range string, e.g. "QQ+, AKs, A5s-A2s, KQo:0.5".
+        Returns:
+            HandRange: The weighted combos.
+        Raises:
+            ValueError: If a token or a weight is malformed.
+
+        """
+        combos: dict[Combo, float] = {}
+        for token in filter(None, re.split(r"[,\s]+", text.strip())):
+            spec, _, weight_text = token.partition(":")
+            try:
+                weight = float(weight_text) if weight_text else 1.0
+            except ValueError:
+                raise ValueError(f"Invalid weight in range token {token!r}.") from None
+            if not 0 <= weight <= 1:
+                raise ValueError(f"Weight must be between 0 and 1, {token!r} found.")
+            for combo in HandRange._expand(spec):
+                combos[combo] = weight
+        return HandRange({combo: weight for combo, weight in combos.items() if weight > 0})
+
+    @staticmethod
+    def _expand(spec: str) -> list[Combo]:
+        """ 一个范围写法展开成的所有组合 """
+        match = HandRange._COMBO.match(spec)
+        if match:
+            first, second = (Card.STR_TO_CARD[text] for text in match.groups())
+            if first == second:
+                raise ValueError(f"Duplicate card in combo {spec!r}.")
+            return [HandRange.combo(first, second)]
+
+        match = HandRange._TOKEN.match(spec)
+        if not match:
+            raise ValueError(f"Invalid range token {spec!r}.")
+        first, second, suitedness, plus, last_first, last_second, last_suitedness = match.groups()
+        high, low = sorted((HandRange.RANKS.index(first), HandRange.RANKS.index(second)), reverse=True)
+
+        if high == low:
+            if suitedness:
+                raise ValueError(f"A pair cannot be suited or offsuit: {spec!r}.")
+            if plus:
+                pairs = range(high, len(HandRange.RANKS))
+            elif last_first:
+                end = HandRange.RANKS.index(last_first)
+                if last_first != last_second or last_suitedness:
+                    raise ValueError(f"Invalid pair range {spec!r}.")
+                pairs = range(min(high, end), max(high, end) + 1)
+            else:
+                pairs = range(high, high + 1)
+            return [combo for rank in pairs for combo in HandRange._rank_combos(rank, rank, "")]
+
+        if plus:
+            # 高牌不变, 踢脚升到比高牌小一级
+            kickers = range(low, high)
+        elif last_first:
+            last_high, last_low = sorted((HandRange.RANKS.index(last_first),
+                                          HandRange.RANKS.index(last_second)), reverse=True)
+            if last_high != high or last_suitedness != suitedness or last_low == last_high:
+                raise ValueError(f"Invalid range {spec!r}: both ends need the same high card and suitedness.")
+            kickers = range(min(low, last_low), max(low, last_low) + 1)
+        else:
+            kickers = range(low, low + 1)
+        return [combo for kicker in kickers for combo in HandRange._rank_combos(high, kicker, suitedness)]
+
+    @staticmethod
+    def _rank_combos(high: int, low: int, suitedness: str) -> list[Combo]:
+        """ 两个点数的所有组合, suitedness 为 's', 'o' 或 '' (两者都要) """
+        high_char, low_char = HandRange.RANKS[high], HandRange.RANKS[low]
+        combos = []
+        for first, second in itertools.product(HandRange.SUITS, repeat=2):
+            if high == low and first >= second:
+                continue
+            if (suitedness == "s" and first != second) or (suitedness == "o" and first == second):
+                continue
+            combos.append(HandRange.combo(Card.STR_TO_CARD[high_char + first],
+                                          Card.STR_TO_CARD[low_char + second]))
+        return combos
+
+    def without(self, cards: Iterable[Card]) -> "HandRange":
+        """ 去掉与给定的牌 (公共牌、死牌) 冲突的组合 """
+        blocked = Card.cards_to_mask(cards)
+        return HandRange({combo: weight for combo, weight in self.combos.items()
+                          if not Card.cards_to_mask(combo) & blocked})
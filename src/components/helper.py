@@ -1,4 +1,4 @@
-""" 存储计算手牌胜率的功能 
+""" 存储计算手牌胜率的功能
     Number of Distinct Hand Values::
 
     Straight Flush   10
@@ -14,7 +14,567 @@
     TOTAL            7462
 """
 
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import closing
+import copy
+from dataclasses import dataclass
+import itertools
+import math
+import os
+import random
+from statistics import NormalDist
+import struct
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+from src.components import Card, Deck, Evaluator, HandRange, SuitIsomorphism
+
+
+@dataclass
+class EquityResult:
+    """ 胜率计算结果, 每个列表按玩家顺序排列 """
+    win: list[float]
+    tie: list[float]
+    equity: list[float]
+    stderr: list[float]
+    trials: int
+    exact: bool = False
+
+
+@dataclass
+class Tally:
+    """ 胜、平次数和底池份额的累计量, 可以按固定顺序合并 """
+    wins: list[int]
+    ties: list[int]
+    shares: list[float]
+    squares: list[float]
+    trials: int = 0
+
+    @classmethod
+    def zeros(cls, n_players: int) -> "Tally":
+        return cls([0] * n_players, [0] * n_players, [0.0] * n_players, [0.0] * n_players)
+
+    def add(self, ranks: list[int]):
+        """ 按一次摊牌的结果累计 """
+        best = min(ranks)
+        winners = [i for i, rank in enumerate(ranks) if rank == best]
+        share = 1 / len(winners)
+        counter = self.wins if len(winners) == 1 else self.ties
+        for i in winners:
+            counter[i] += 1
+            self.shares[i] += share
+            self.squares[i] += share * share
+        self.trials += 1
+
+    def merge(self, other: "Tally"):
+        for mine, theirs in ((self.wins, other.wins), (self.ties, other.ties),
+                             (self.shares, other.shares), (self.squares, other.squares)):
+            for i, value in enumerate(theirs):
+                mine[i] += value
+        self.trials += other.trials
+
+    def stderr(self) -> list[float]:
+        """ 每位玩家 equity 的标准误 """
+        return [math.sqrt(max(square / self.trials - (share / self.trials) ** 2, 0.0) / self.trials)
+                for share, square in zip(self.shares, self.squares)]
+
+    def to_result(self, exact: bool = False) -> EquityResult:
+        return EquityResult(win=[w / self.trials for w in self.wins],
+                            tie=[t / self.trials for t in self.ties],
+                            equity=[s / self.trials for s in self.shares],
+                            stderr=[0.0] * len(self.wins) if exact else self.stderr(),
+                            trials=self.trials,
+                            exact=exact)
+
+
+class EquityCache:
+    """ 胜率结果的LRU缓存, 键为花色同构的规范形式 """
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results: OrderedDict[tuple, EquityResult] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, key: tuple) -> Optional[EquityResult]:
+        result = self._results.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._results.move_to_end(key)
+        return copy.deepcopy(result)
+
+    def put(self, key: tuple, result: EquityResult):
+        self._results[key] = copy.deepcopy(result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.maxsize:
+            # 淘汰最久未使用的结果
+            self._results.popitem(last=False)
+
+    def clear(self):
+        self._results.clear()
+        self.hits = self.misses = 0
+
+
 class Helper:
     """ 手牌胜率计算器 """
-    def __init__(self) -> None:
-        pass
+    FULL_DECK: tuple[Card, ...] = tuple(Card(s, r) for s, r
+                                        in itertools.product(Deck.SUITS, Deck.RANKS))
+
+    # 169种起手牌, 按13x13网格排列: 对角线为对子, 右上为同花(s), 左下为杂色(o)
+    PREFLOP_CLASSES: tuple[str, ...] = tuple(
+        Card.STR_RANKS[12 - min(i, j)] + Card.STR_RANKS[12 - max(i, j)]
+        + ("" if i == j else "s" if i < j else "o")
+        for i in range(13) for j in range(13))
+    PREFLOP_CLASS_INDEX: dict[str, int] = dict(zip(PREFLOP_CLASSES, range(169)))
+    PREFLOP_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                      "data", "preflop_equity.bin")
+    PREFLOP_TABLE_HEADER = struct.Struct("<4sII")  # magic, version, trials per matchup
+    PREFLOP_TABLE_MAGIC = b"THPF"
+    PREFLOP_TABLE_VERSION = 1
+    PREFLOP_TABLE_TRIALS = 40_000  # 随包发布的表所用的模拟次数
+    _preflop_table: Optional[array] = None
+
+    def __init__(self, seed: Optional[int] = None, processes: int = 1, cache_size: int = 4096) -> None:
+        """
+        @args:
+            seed: 随机种子, 同一个种子的结果与进程数无关
+            processes: 并行计算使用的进程数, 1 表示在当前进程计算
+            cache_size: 胜率结果LRU缓存的容量, 0 表示不缓存
+        """
+        self._seed = seed
+        self._rng = random.Random(seed)
+        self._processes = processes
+        self._pool: Optional[Executor] = None
+        self.cache: Optional[EquityCache] = EquityCache(cache_size) if cache_size else None
+
+    def __enter__(self) -> "Helper":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """ 关闭进程池 """
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def equity(self,
+               hands: list[list[Card]],
+               board: Optional[list[Card]] = None,
+               dead: Optional[list[Card]] = None,
+               max_trials: int = 100_000,
+               tolerance: float = 0.005,
+               confidence: float = 0.95,
+               time_limit: Optional[float] = None,
+               chunk_size: int = 2_000,
+               seed: Optional[int] = None) -> EquityResult:
+        """
+        Monte Carlo 胜率计算, 随机补全公共牌
+        模拟按 chunk_size 分块, 每块使用由主种子派生的种子, 并按块的顺序合并和检查停止条件,
+        因此同一个种子的结果与进程数无关 (time_limit 触发的提前结束除外)
+        @args:
+            hands: 每位玩家的两张手牌
+            board: 已知的公共牌 (0, 3, 4 或 5张)
+            dead: 已知不在牌堆中的牌
+            max_trials: 最多模拟的次数
+            tolerance: 置信区间的半宽, 所有玩家的equity都达到该精度时提前结束
+            confidence: 置信水平
+            time_limit: 最多运行的秒数, 至少会完成第一块
+            chunk_size: 每块模拟的次数, 每块结束后检查一次停止条件
+            seed: 本次模拟的种子, 默认由 Helper 的随机数生成器产生
+
+        @return:
+            EquityResult: 每位玩家的 win/tie/equity 以及 equity 的标准误
+        """
+        if max_trials <= 0 or chunk_size <= 0:
+            raise ValueError(f"max_trials and chunk_size must be positive, {max_trials} and {chunk_size} found.")
+        board = list(board) if board else []
+        stock = self._stock(hands, board, dead)
+        if len(board) == 5:
+            # 公共牌已经发完, 结果是确定的
+            return self.exact_equity(hands, board, dead)
+
+        # 抽样的结果取决于种子, 不同种子的结果不能互相代替
+        key = ("sample", SuitIsomorphism.canonical_key(hands, board, dead),
+               max_trials, tolerance, confidence, chunk_size,
+               ("call", seed) if seed is not None else ("helper", self._seed))
+        cached = self.cache.get(key) if self.cache is not None else None
+        if cached is not None:
+            return cached
+
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        deadline = time.perf_counter() + time_limit if time_limit is not None else math.inf
+        master = random.Random(seed if seed is not None else self._rng.getrandbits(64))
+        n_chunks = math.ceil(max_trials / chunk_size)
+        tasks = ((hands, board, stock, master.getrandbits(64), min(chunk_size, max_trials - i * chunk_size))
+                 for i in range(n_chunks))
+
+        tally = Tally.zeros(len(hands))
+        timed_out = False
+        with closing(self._map(_sample_chunk, tasks)) as chunks:
+            for chunk in chunks:
+                tally.merge(chunk)
+                if z * max(tally.stderr()) <= tolerance:
+                    break
+                if time.perf_counter() >= deadline:
+                    timed_out = tally.trials < max_trials
+                    break
+        if timed_out:
+            # 被截止时间打断的结果精度不够, 不能返回给之后没有时间限制的调用
+            return tally.to_result()
+        return self._remember(key, tally.to_result())
+
+    def exact_equity(self,
+                     hands: list[list[Card]],
+                     board: Optional[list[Card]] = None,
+                     dead: Optional[list[Card]] = None) -> EquityResult:
+        """
+        枚举所有可能的公共牌, 计算精确胜率
+        每种公共牌只计算一次, 所有玩家共用 (翻牌圈单挑只有 C(45,2)=990 种)
+        翻前需要枚举 C(48,5) 种公共牌, 耗时较长, 应优先使用 equity 或多进程
+        @args:
+            hands: 每位玩家的两张手牌
+            board: 已知的公共牌 (0, 3, 4 或 5张)
+            dead: 已知不在牌堆中的牌
+
+        @return:
+            EquityResult: 每位玩家的 win/tie/equity, 标准误为0
+        """
+        board = list(board) if board else []
+        stock = self._stock(hands, board, dead)
+        key = ("exact", SuitIsomorphism.canonical_key(hands, board, dead))
+        cached = self.cache.get(key) if self.cache is not None else None
+        if cached is not None:
+            return cached
+
+        if len(board) == 5:
+            tasks: Iterable[tuple] = [(hands, board, stock, None)]
+        else:
+            # 按公共牌中第一张牌在牌堆中的位置分块, 分块方式与进程数无关
+            tasks = ((hands, board, stock, first) for first in range(len(stock)))
+
+        tally = Tally.zeros(len(hands))
+        for chunk in self._map(_exact_chunk, tasks):
+            tally.merge(chunk)
+        return self._remember(key, tally.to_result(exact=True))
+
+    def range_equity(self,
+                     ranges: "list[HandRange | str]",
+                     board: Optional[list[Card]] = None,
+                     dead: Optional[list[Card]] = None,
+                     max_runouts: int = 10_000) -> EquityResult:
+        """
+        两个范围对抗的胜率 (需要numpy), 组合按权重和彼此不冲突的概率加权
+        每种公共牌对每个组合只计算一次牌力, 两两比较只是数组运算, 不重复计算牌力。
+        公共牌的补全方式不超过 max_runouts 种时全部枚举 (结果精确), 否则随机抽取 max_runouts 种
+        @args:
+            ranges: 两个范围, 可以是 HandRange 或范围写法 (如 "QQ+, AKs, KQo:0.5")
+            board: 已知的公共牌 (0, 3, 4 或 5张)
+            dead: 已知不在牌堆中的牌
+            max_runouts: 精确枚举的上限, 也是随机抽取的次数
+
+        @return:
+            EquityResult: 两个范围的 win/tie/equity; trials 为公共牌的种数
+        """
+        import numpy as np
+
+        if len(ranges) != 2:
+            raise ValueError(f"Exactly 2 ranges are needed, {len(ranges)} found.")
+        board = list(board) if board else []
+        if len(board) > 5 or len(board) in (1, 2):
+            raise ValueError(f"Board must have 0, 3, 4 or 5 cards, {len(board)} found.")
+        known = board + list(dead or [])
+        if len(set(known)) != len(known):
+            raise ValueError(f"Duplicate cards found: {known}")
+
+        # 与公共牌、死牌冲突的组合直接去掉; 与对方范围的冲突由 compatible 处理
+        parsed = [(HandRange.parse(r) if isinstance(r, str) else r).without(known) for r in ranges]
+        if any(not len(r) for r in parsed):
+            raise ValueError("A range has no combos left after removing blocked cards.")
+        holes, weights, masks = [], [], []
+        for hand_range in parsed:
+            combos = list(hand_range.combos.items())
+            holes.append(np.array([combo for combo, _ in combos], dtype=np.int64))
+            weights.append(np.array([weight for _, weight in combos]))
+            masks.append(np.array([Card.cards_to_mask(combo) for combo, _ in combos], dtype=np.int64))
+        (hole_a, hole_b), (mask_a, mask_b) = holes, masks
+        compatible = weights[0][:, None] * weights[1][None, :] * ((mask_a[:, None] & mask_b[None, :]) == 0)
+        if not compatible.any():
+            raise ValueError("The two ranges have no compatible combos.")
+
+        known_mask = Card.cards_to_mask(known)
+        live_cards = [card for card in Card.CARDS if not known_mask >> card.index & 1]
+        stock = np.array(live_cards, dtype=np.int64)
+        stock_masks = np.array([1 << card.index for card in live_cards], dtype=np.int64)
+        missing = 5 - len(board)
+        exact = math.comb(len(stock), missing) <= max_runouts
+        if exact:
+            runouts = np.array(list(itertools.combinations(range(len(stock)), missing)),
+                               dtype=np.int64).reshape(-1, missing)
+        else:
+            # 每行取一组随机数的前 missing 个最小值的位置, 即不放回抽样
+            rng = np.random.default_rng(self._rng.getrandbits(64))
+            runouts = np.argsort(rng.random((max_runouts, len(stock))), axis=1)[:, :missing]
+
+        n_a, n_b = len(hole_a), len(hole_b)
+        chunk = max(1, min(100_000 // (n_a + n_b), 4_000_000 // (n_a * n_b)))
+        total = np.zeros(len(runouts))
+        score = np.zeros(len(runouts))  # 范围A的胜 + 平/2
+        wins = ties = 0.0
+        for start in range(0, len(runouts), chunk):
+            picked = runouts[start:start + chunk]
+            n = len(picked)
+            boards = np.concatenate([np.tile(np.array(board, dtype=np.int64), (n, 1)), stock[picked]], axis=1)
+            runout_mask = np.bitwise_or.reduce(stock_masks[picked], axis=1) if missing else np.zeros(n, np.int64)
+            live_a = (mask_a[None, :] & runout_mask[:, None]) == 0
+            live_b = (mask_b[None, :] & runout_mask[:, None]) == 0
+            ranks_a = Helper._range_ranks(hole_a, boards, live_a)
+            ranks_b = Helper._range_ranks(hole_b, boards, live_b)
+            weight = compatible[None] * live_a[:, :, None] * live_b[:, None, :]
+            win = (weight * (ranks_a[:, :, None] < ranks_b[:, None, :])).sum(axis=(1, 2))
+            tie = (weight * (ranks_a[:, :, None] == ranks_b[:, None, :])).sum(axis=(1, 2))
+            total[start:start + n] = weight.sum(axis=(1, 2))
+            score[start:start + n] = win + tie / 2
+            wins += win.sum()
+            ties += tie.sum()
+
+        weight_sum = total.sum()
+        equity = score.sum() / weight_sum
+        if exact:
+            stderr = 0.0
+        else:
+            # 比率估计量的标准误
+            stderr = float(np.sqrt(((score - equity * total) ** 2).sum()) / weight_sum)
+        win_a, tie, equity = float(wins / weight_sum), float(ties / weight_sum), float(equity)
+        return EquityResult(win=[win_a, 1 - win_a - tie],
+                            tie=[tie, tie],
+                            equity=[equity, 1 - equity],
+                            stderr=[stderr, stderr],
+                            trials=len(runouts),
+                            exact=exact)
+
+    @staticmethod
+    def _range_ranks(holes, boards, live):
+        """ 每种公共牌 (行) 下每个组合 (列) 的牌力, 只计算不与公共牌冲突的组合 """
+        import numpy as np
+
+        ranks = np.zeros(live.shape, dtype=np.int64)
+        rows, columns = np.nonzero(live)
+        ranks[rows, columns] = Evaluator.evaluate_batch(holes[columns], boards[rows])
+        return ranks
+
+    def _remember(self, key: tuple, result: EquityResult) -> EquityResult:
+        if self.cache is not None:
+            self.cache.put(key, result)
+        return result
+
+    @staticmethod
+    def hand_class(hand: list[Card]) -> str:
+        """
+        两张手牌对应的起手牌类别
+
+        Example:
+            [♠A, ♠K] -> "AKs", [♥7, ♣2] -> "72o", [♦Q, ♣Q] -> "QQ"
+        """
+        high, low = sorted(hand, key=lambda card: card.rank, reverse=True)
+        ranks = Card.STR_RANKS[high.rank] + Card.STR_RANKS[low.rank]
+        if high.rank == low.rank:
+            return ranks
+        return ranks + ("s" if high.suit == low.suit else "o")
+
+    @staticmethod
+    def preflop_equity(hand: "list[Card] | str", other: "list[Card] | str") -> float:
+        """
+        查表得到翻前单挑 all-in 时 hand 对 other 的胜率 (平局算一半)
+        @args:
+            hand, other: 两张手牌, 或者起手牌类别 (如 "AKs", "QQ", "72o")
+
+        @return:
+            float: 两个类别所有不冲突花色组合的平均胜率
+        """
+        if Helper._preflop_table is None:
+            Helper._preflop_table = Helper.load_preflop_table()
+        index = Helper.PREFLOP_CLASS_INDEX
+        i = index[hand if isinstance(hand, str) else Helper.hand_class(hand)]
+        j = index[other if isinstance(other, str) else Helper.hand_class(other)]
+        return Helper._preflop_table[i * 169 + j]
+
+    @staticmethod
+    def load_preflop_table(path: Optional[str] = None) -> array:
+        """ 读取预计算的 169x169 翻前胜率表 """
+        with open(path or Helper.PREFLOP_TABLE_PATH, "rb") as file:
+            data = file.read()
+        magic, version, _ = Helper.PREFLOP_TABLE_HEADER.unpack_from(data)
+        if magic != Helper.PREFLOP_TABLE_MAGIC or version != Helper.PREFLOP_TABLE_VERSION:
+            raise ValueError(f"Unknown preflop table format: {magic!r} v{version}.")
+        table = array("f")
+        table.frombytes(data[Helper.PREFLOP_TABLE_HEADER.size:])
+        if len(table) != 169 * 169:
+            raise ValueError("Preflop table is truncated.")
+        return table
+
+    @staticmethod
+    def build_preflop_table(trials: int = PREFLOP_TABLE_TRIALS,
+                            seed: int = 0,
+                            path: Optional[str] = None,
+                            verbose: bool = False) -> array:
+        """
+        用 Evaluator.evaluate_batch 重新生成翻前胜率表并写入文件 (需要numpy)
+        每对类别随机抽取 trials 组不冲突的具体手牌和公共牌, 标准误不超过 0.5/sqrt(trials)
+        同类对同类的胜率由对称性恰为 0.5
+        @args:
+            trials: 每对类别的模拟次数
+            seed: 随机种子
+            path: 输出文件, 默认为 PREFLOP_TABLE_PATH
+            verbose: 打印进度
+        """
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        deck = np.array(sorted(Helper.FULL_DECK), dtype=np.int64)
+        combos = [[pair for pair in itertools.combinations(range(52), 2)
+                   if Helper.hand_class([Card.from_int(int(deck[k])) for k in pair]) == name]
+                  for name in Helper.PREFLOP_CLASSES]
+
+        table = array("f", [0.5]) * (169 * 169)
+        rows = np.arange(trials)[:, None]
+        for i in range(169):
+            for j in range(i + 1, 169):
+                matchups = np.array([a + b for a in combos[i] for b in combos[j]
+                                     if not set(a) & set(b)], dtype=np.int64)
+                known = matchups[rng.integers(len(matchups), size=trials)]
+
+                # 拒绝采样: 与已知牌或彼此重复的公共牌重新抽取
+                board = rng.integers(52, size=(trials, 5))
+                while True:
+                    cards = np.sort(np.concatenate([known, board], axis=1), axis=1)
+                    invalid = (cards[:, 1:] == cards[:, :-1]).any(axis=1)
+                    if not invalid.any():
+                        break
+                    board[invalid] = rng.integers(52, size=(int(invalid.sum()), 5))
+
+                ranks_i = Evaluator.evaluate_batch(deck[known[:, :2]], deck[board])
+                ranks_j = Evaluator.evaluate_batch(deck[known[:, 2:]], deck[board])
+                equity = float(np.mean((ranks_i < ranks_j) + 0.5 * (ranks_i == ranks_j)))
+                table[i * 169 + j] = equity
+                table[j * 169 + i] = 1 - equity
+            if verbose:
+                print(f"{Helper.PREFLOP_CLASSES[i]:>4} done ({i + 1}/169)", flush=True)
+
+        path = path or Helper.PREFLOP_TABLE_PATH
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(Helper.PREFLOP_TABLE_HEADER.pack(
+                Helper.PREFLOP_TABLE_MAGIC, Helper.PREFLOP_TABLE_VERSION, trials))
+            file.write(table.tobytes())
+        Helper._preflop_table = table
+        return table
+
+    def _map(self, function: Callable[..., Tally], tasks: Iterable[tuple]) -> Iterator[Tally]:
+        """ 按任务顺序返回结果; 多进程时最多同时提交 2 倍进程数的任务 """
+        if self._processes <= 1:
+            for task in tasks:
+                yield function(*task)
+            return
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self._processes)
+        pending = deque()
+        tasks = iter(tasks)
+        for task in itertools.islice(tasks, 2 * self._processes):
+            pending.append(self._pool.submit(function, *task))
+        try:
+            while pending:
+                result = pending.popleft().result()
+                for task in itertools.islice(tasks, 1):
+                    pending.append(self._pool.submit(function, *task))
+                yield result
+        finally:
+            # 提前结束 (生成器被关闭) 时取消还没开始的任务, 之后的查询不必排在它们后面;
+            # 已经交给工作进程的任务 (最多 进程数+1 个) 无法取消, 只能等它们完成
+            for future in pending:
+                future.cancel()
+
+    def _stock(self,
+               hands: list[list[Card]],
+               board: list[Card],
+               dead: Optional[list[Card]]) -> list[Card]:
+        """ 检查已知牌, 返回剩余的牌堆 """
+        if len(hands) < 2:
+            raise ValueError(f"At least 2 players are needed, {len(hands)} found.")
+        if any(len(hand) != 2 for hand in hands):
+            raise ValueError("Each player must hold exactly 2 cards.")
+        if len(board) > 5 or len(board) in (1, 2):
+            raise ValueError(f"Board must have 0, 3, 4 or 5 cards, {len(board)} found.")
+
+        known = list(itertools.chain(*hands, board, dead or []))
+        if len(set(known)) != len(known):
+            raise ValueError(f"Duplicate cards found: {known}")
+        known_set = set(known)
+        return [card for card in Helper.FULL_DECK if card not in known_set]
+
+    @staticmethod
+    def _ranks(hands: list[list[Card]],
+               states: list[tuple[int, int]],
+               board: list[Card],
+               board_state: tuple[int, int]) -> list[int]:
+        """ 一种公共牌下所有玩家的牌力, 公共牌部分只计算一次 """
+        return [Evaluator._seven_from_states(hand, state, board, board_state)
+                for hand, state in zip(hands, states)]
+
+
+def _sample_chunk(hands: list[list[Card]],
+                  board: list[Card],
+                  stock: list[Card],
+                  seed: int,
+                  trials: int) -> Tally:
+    """ 用给定的种子随机模拟 trials 次 (可在子进程中运行) """
+    tally = Tally.zeros(len(hands))
+    missing = 5 - len(board)
+    stock = list(stock)
+    # 复用的缓冲区: 只改写公共牌的最后几个位置
+    states = [Evaluator.get_partial_state(hand) for hand in hands]
+    board_state = Evaluator.get_partial_state(board)
+    board_buffer = board + [None] * missing
+    runout = slice(5 - missing, 5)
+    random_ = random.Random(seed).random
+    n_stock = len(stock)
+
+    for _ in range(trials):
+        # 部分 Fisher-Yates 洗牌: 牌堆前 missing 张就是本次的公共牌
+        for i in range(missing):
+            j = i + int(random_() * (n_stock - i))
+            stock[i], stock[j] = stock[j], stock[i]
+        board_buffer[runout] = stock[:missing]
+
+        tally.add(Helper._ranks(hands, states, board_buffer, Evaluator.merge_states(
+            board_state, Evaluator.get_partial_state(stock[:missing]))))
+    return tally
+
+
+def _exact_chunk(hands: list[list[Card]],
+                 board: list[Card],
+                 stock: list[Card],
+                 first: Optional[int]) -> Tally:
+    """ 枚举第一张牌为 stock[first] 的所有公共牌 (可在子进程中运行) """
+    tally = Tally.zeros(len(hands))
+    states = [Evaluator.get_partial_state(hand) for hand in hands]
+    board_state = Evaluator.get_partial_state(board)
+    if first is None:
+        tally.add(Helper._ranks(hands, states, board, board_state))
+        return tally
+
+    head = board + [stock[first]]
+    head_state = Evaluator.merge_states(board_state, Evaluator.get_partial_state([stock[first]]))
+    for runout in itertools.combinations(stock[first + 1:], 4 - len(board)):
+        tally.add(Helper._ranks(hands, states, head + list(runout), Evaluator.merge_states(
+            head_state, Evaluator.get_partial_state(runout))))  # type: ignore
+    return tally
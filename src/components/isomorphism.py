@@ -0,0 +1,62 @@
+""" 花色同构: 只差一个花色置换的牌局 (如 ♥A♥K/♥Q♥J♣2 与 ♠A♠K/♠Q♠J♦2) 映射到同一个规范形式 """
+
+import itertools
+from typing import Iterable, Optional
+
+from src.components import Card
+
+
+class SuitIsomorphism:
+    """
+    Maps (hole cards, board, dead cards) to a canonical key, identical for all
+    spots that only differ by a permutation of the suits.
+
+    The key is the smallest of the 24 suit relabelings, where each hand, the
+    board and the dead cards are sorted (their order does not matter) but the
+    order of the players is kept.
+
+    """
+    # cdhs 比特在 Card 中的位置
+    SUIT_SHIFT = 12
+    SUIT_MASK = 0xF << SUIT_SHIFT
+    PERMUTATIONS: tuple[tuple[int, ...], ...] = tuple(itertools.permutations(range(4)))
+
+    @staticmethod
+    def permute(card: int, permutation: tuple[int, ...]) -> int:
+        """
+        Relabels the suit of a card int.
+
+        Args:
+            card (int): A card int.
+            permutation (tuple[int, ...]): New suit bit index for each suit bit index
+                (spades=0, hearts=1, diamonds=2, clubs=3).
+        Returns:
+            int: The card int with the new suit.
+
+        """
+        suit_index = ((card >> SuitIsomorphism.SUIT_SHIFT) & 0xF).bit_length() - 1
+        return (card & ~SuitIsomorphism.SUIT_MASK) | (1 << (SuitIsomorphism.SUIT_SHIFT + permutation[suit_index]))
+
+    @staticmethod
+    def canonical_key(hands: Iterable[Iterable[Card]],
+                      board: Optional[Iterable[Card]] = None,
+                      dead: Optional[Iterable[Card]] = None) -> tuple:
+        """
+        Computes the canonical form of a spot.
+
+        Args:
+            hands (Iterable[Iterable[Card]]): The hole cards of each player, in order.
+            board (Iterable[Card]): The community cards.
+            dead (Iterable[Card]): The cards known to be out of the deck.
+        Returns:
+            tuple: A hashable key, equal for suit-isomorphic spots.
+
+        """
+        groups = [list(hand) for hand in hands]
+        groups.append(list(board or []))
+        groups.append(list(dead or []))
+        permute = SuitIsomorphism.permute
+
+        return min(tuple(tuple(sorted(permute(card, permutation) for card in group))
+                         for group in groups)
+                   for permutation in SuitIsomorphism.PERMUTATIONS)
@@ -52,17 +52,70 @@ Example:
     - Royal flush (best hand possible) -> 1
     - 7-5-4-3-2 unsuited (worst hand possible) -> 7462
 
+The same maps are extended to 6 and 7 card sets, each of them mapped to the rank
+of its best 5 card subset. Prime products of sets of different sizes never
+collide (unique factorization), so they live in the same dictionaries.
+
+The finished table is cached in a versioned binary file (sorted key/rank arrays)
+and memory-mapped on the next import, it is only rebuilt when the file is
+missing or stale. The same binary layout can be published once into shared
+memory, worker processes then attach to it zero-copy instead of loading dicts.
+
 """
 
+from array import array
+import atexit
+from bisect import bisect_left
+from collections.abc import Mapping
+from contextlib import contextmanager
+import hashlib
+import inspect
 import itertools
+import mmap
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import os
+import struct
+import sys
+from typing import Iterator, Optional
 
 from src.components import Card
 
+class ArrayLookup(Mapping):
+    """
+    Read-only map from prime-product to rank backed by sorted arrays, used for
+    tables living in shared memory (no boxed Python ints per entry).
+
+    Each lookup is a binary search instead of a hash, about 25% slower per
+    evaluation than the dicts, in exchange for ~7MB less memory per worker and
+    attaching in well under a millisecond.
+
+    """
+
+    def __init__(self, keys: memoryview, ranks: memoryview) -> None:
+        self._keys = keys
+        self._ranks = ranks
+
+    def __getitem__(self, key: int) -> int:
+        i = bisect_left(self._keys, key)
+        if i == len(self._keys) or self._keys[i] != key:
+            raise KeyError(key)
+        return self._ranks[i]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
 class LookupTable:
     """
     Attributes:
         flush_lookup (Dict[int, int]): map from prime-product to rank for suited cards
+            (5, 6 or 7 cards of one suit)
         unsuited_lookup (Dict[int, int]): map from prime-product to rank for unsuited cards
+            (5, 6 or 7 cards)
 
     """
     MAX_STRAIGHT_FLUSH = 10
@@ -87,6 +140,10 @@ class LookupTable:
         MAX_HIGH_CARD: 9,
     }
 
+    # 在类定义之后填充, 见文件末尾
+    RANK_TO_CLASS: bytes
+    RANK_TO_STRING: tuple[str, ...]
+
     RANK_CLASS_TO_STRING = {
         1: "Straight Flush",
         2: "Four of a Kind",
@@ -99,6 +156,19 @@ class LookupTable:
         9: "High card",
     }
 
+    # 二进制缓存: 文件头之后依次为 flush keys, unsuited keys (int64), flush ranks, unsuited ranks (uint16)
+    CACHE_MAGIC = b"THLT"
+    CACHE_VERSION = 2
+    CACHE_HEADER = struct.Struct("=4sIQII")  # magic, version, 生成代码的指纹, flush size, unsuited size
+    # 生成查找表的方法和常量, 任何一个改变都会使缓存失效
+    GENERATORS = ("__init__", "_flushes", "_straight_and_highcards", "_multiples",
+                  "_six_and_seven_cards", "_extend", "_get_lexographically_next_bit_sequence")
+    _fingerprint: Optional[int] = None
+    CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              "__pycache__", f"lookup_table.v{CACHE_VERSION}.bin")
+    # 设置了该环境变量的进程在导入时直接挂载共享内存中的查找表
+    SHARED_MEMORY_ENV = "HOLDEM_LOOKUP_TABLE_SHM"
+
     def __init__(self):
         # create dictionaries
         self.flush_lookup: dict[int, int] = {}
@@ -108,6 +178,8 @@ class LookupTable:
         self._flushes()  # this will call straights and high card method,
         # we reuse some of the bit sequences
         self._multiples()
+        # 6张、7张的牌型在5张的基础上逐张扩展
+        self._six_and_seven_cards()
 
     def _flushes(self):
         """
@@ -288,6 +360,271 @@ class LookupTable:
                 self.unsuited_lookup[product] = rank
                 rank += 1
 
+    @classmethod
+    def fingerprint(cls) -> int:
+        """
+        A 64 bit hash of the source of the table generators and of the constants
+        they use, stored in the cache header so that editing the generators
+        invalidates old caches without a manual version bump.
+
+        """
+        if LookupTable._fingerprint is None:
+            digest = hashlib.sha256(repr((Card.PRIMES, sorted(LookupTable.MAX_TO_RANK_CLASS))).encode())
+            for name in LookupTable.GENERATORS:
+                function = inspect.unwrap(getattr(LookupTable, name))
+                try:
+                    digest.update(inspect.getsource(function).encode())
+                except (OSError, TypeError):
+                    # 没有源码 (如只安装了 .pyc) 时退回到字节码
+                    digest.update(function.__code__.co_code + repr(function.__code__.co_names).encode())
+            LookupTable._fingerprint = int.from_bytes(digest.digest()[:8], "little")
+        return LookupTable._fingerprint
+
+    def export_arrays(self) -> tuple[array, array, array, array]:
+        """
+        Exports both lookups as dense arrays sorted by prime product, suitable for
+        binary search and vectorized lookup.
+
+        Returns:
+            tuple[array, array, array, array]: flush keys (int64), flush ranks (uint16),
+                unsuited keys (int64), unsuited ranks (uint16)
+
+        """
+        flush_keys = sorted(self.flush_lookup)
+        unsuited_keys = sorted(self.unsuited_lookup)
+        return (array("q", flush_keys),
+                array("H", (self.flush_lookup[k] for k in flush_keys)),
+                array("q", unsuited_keys),
+                array("H", (self.unsuited_lookup[k] for k in unsuited_keys)))
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes the table into the versioned binary cache format.
+
+        """
+        flush_keys, flush_ranks, unsuited_keys, unsuited_ranks = self.export_arrays()
+        header = LookupTable.CACHE_HEADER.pack(LookupTable.CACHE_MAGIC, LookupTable.CACHE_VERSION,
+                                               LookupTable.fingerprint(), len(flush_keys), len(unsuited_keys))
+        return b"".join((header, flush_keys.tobytes(), unsuited_keys.tobytes(),
+                         flush_ranks.tobytes(), unsuited_ranks.tobytes()))
+
+    @staticmethod
+    def split_buffer(buffer) -> tuple[memoryview, memoryview, memoryview, memoryview]:
+        """
+        Splits a buffer in the binary cache format into zero-copy array views.
+        The caller is responsible for releasing the views.
+
+        Args:
+            buffer: Any object supporting the buffer protocol (bytes, mmap, shared memory).
+        Returns:
+            tuple[memoryview, ...]: flush keys, flush ranks, unsuited keys, unsuited ranks
+        Raises:
+            ValueError: If the buffer is not a cache of the current version and generators.
+
+        """
+        with memoryview(buffer) as view:
+            if len(view) < LookupTable.CACHE_HEADER.size:
+                raise ValueError("Lookup table cache is truncated.")
+            magic, version, fingerprint, n_flush, n_unsuited = LookupTable.CACHE_HEADER.unpack_from(view)
+            if magic != LookupTable.CACHE_MAGIC or version != LookupTable.CACHE_VERSION:
+                raise ValueError(f"Stale lookup table cache: {magic!r} v{version}.")
+            if fingerprint != LookupTable.fingerprint():
+                raise ValueError("Stale lookup table cache: the table generators have changed.")
+
+            offset = LookupTable.CACHE_HEADER.size
+            sections = []
+            for typecode, count in (("q", n_flush), ("q", n_unsuited), ("H", n_flush), ("H", n_unsuited)):
+                size = count * array(typecode).itemsize
+                sections.append((offset, size, typecode))
+                offset += size
+            # 共享内存的大小可能按页对齐, 只检查是否截断
+            if offset > len(view):
+                raise ValueError("Lookup table cache is truncated.")
+            views = {name: view[offset:offset + size].cast(typecode) for name, (offset, size, typecode)
+                     in zip(("flush_keys", "unsuited_keys", "flush_ranks", "unsuited_ranks"), sections)}
+        return views["flush_keys"], views["flush_ranks"], views["unsuited_keys"], views["unsuited_ranks"]
+
+    @classmethod
+    def from_buffer(cls, buffer) -> "LookupTable":
+        """
+        Creates a table from a buffer in the binary cache format, without rebuilding it.
+
+        """
+        table = cls.__new__(cls)
+        views = LookupTable.split_buffer(buffer)
+        flush_keys, flush_ranks, unsuited_keys, unsuited_ranks = views
+        table.flush_lookup = dict(zip(flush_keys, flush_ranks))
+        table.unsuited_lookup = dict(zip(unsuited_keys, unsuited_ranks))
+        for view in views:
+            view.release()
+        return table
+
+    @classmethod
+    def from_file(cls, path: str) -> "LookupTable":
+        """
+        Memory-maps a binary cache file and creates the table from it.
+
+        Raises:
+            OSError: If the file cannot be read.
+            ValueError: If the file is empty, truncated or stale.
+
+        """
+        with open(path, "rb") as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return cls.from_buffer(buffer)
+
+    @classmethod
+    def from_shared(cls, name: str) -> "LookupTable":
+        """
+        Attaches to a table published with :meth:`share`, zero-copy.
+
+        Args:
+            name (str): The name of the shared memory block.
+        Raises:
+            OSError: If the shared memory block does not exist.
+            ValueError: If the block does not hold a table of the current version.
+
+        """
+        if sys.version_info >= (3, 13):
+            # 只有发布者登记共享内存, 由它负责删除
+            shared_memory = SharedMemory(name=name, track=False)
+        else:
+            # 3.13 之前打开共享内存时总会登记到resource tracker, 没有公开的接口可以关闭,
+            # 只能依赖 CPython 的内部属性: multiprocessing 启动的子进程与发布者共用同一个tracker,
+            # 独立启动的进程则会拥有自己的tracker, 必须取消登记, 否则它退出时会删除共享内存
+            owns_tracker = getattr(resource_tracker._resource_tracker, "_fd", None) is None  # type: ignore
+            shared_memory = SharedMemory(name=name)
+            if owns_tracker:
+                resource_tracker.unregister(shared_memory._name, "shared_memory")  # type: ignore
+        views = cls.split_buffer(shared_memory.buf)
+        flush_keys, flush_ranks, unsuited_keys, unsuited_ranks = views
+
+        table = cls.__new__(cls)
+        table.flush_lookup = ArrayLookup(flush_keys, flush_ranks)  # type: ignore
+        table.unsuited_lookup = ArrayLookup(unsuited_keys, unsuited_ranks)  # type: ignore
+
+        def detach():
+            # 先释放数组视图, 才能关闭共享内存的映射
+            for view in views:
+                view.release()
+            shared_memory.close()
+
+        atexit.register(detach)
+        return table
+
+    @contextmanager
+    def share(self):
+        """
+        Publishes the table once into shared memory for the duration of the context.
+        Worker processes started inside the context (e.g. a ``multiprocessing`` pool
+        with the spawn or forkserver start method) attach to it on import instead of
+        loading their own copy.
+
+        Example:
+            with LOOKUP_TABLE.share():
+                with ProcessPoolExecutor() as pool:
+                    ...
+
+        Yields:
+            str: The name of the shared memory block.
+
+        """
+        data = self.to_bytes()
+        shared_memory = SharedMemory(create=True, size=len(data))
+        shared_memory.buf[:len(data)] = data
+        previous = os.environ.get(LookupTable.SHARED_MEMORY_ENV)
+        os.environ[LookupTable.SHARED_MEMORY_ENV] = shared_memory.name
+        try:
+            yield shared_memory.name
+        finally:
+            if previous is None:
+                os.environ.pop(LookupTable.SHARED_MEMORY_ENV, None)
+            else:
+                os.environ[LookupTable.SHARED_MEMORY_ENV] = previous
+            shared_memory.close()
+            shared_memory.unlink()
+
+    def save(self, path: str):
+        """
+        Writes the binary cache file atomically.
+
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(self.to_bytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "LookupTable":
+        """
+        Loads the table from shared memory when published by a parent process, else
+        from the binary cache, rebuilding (and caching) it when the cache file is
+        missing or stale.
+
+        Args:
+            path (str): The cache file, defaults to :attr:`CACHE_PATH`.
+
+        """
+        shared_name = os.environ.get(cls.SHARED_MEMORY_ENV)
+        if shared_name:
+            try:
+                return cls.from_shared(shared_name)
+            except (OSError, ValueError):
+                pass
+
+        path = path or cls.CACHE_PATH
+        try:
+            return cls.from_file(path)
+        except (OSError, ValueError):
+            pass
+
+        table = cls()
+        try:
+            table.save(path)
+        except OSError:
+            # 只读的安装目录, 不缓存
+            pass
+        return table
+
+    def _six_and_seven_cards(self):
+        """
+        6 and 7 card sets.
+
+        The best rank of an n card set is the best rank among its (n-1) card
+        subsets, so both tables are extended one card at a time.
+        """
+        flushes = dict(self.flush_lookup)
+        unsuited = dict(self.unsuited_lookup)
+        for _ in range(2):
+            # 同花内的牌点数各不相同，非同花每个点数最多4张
+            flushes = LookupTable._extend(flushes, max_count=1)
+            unsuited = LookupTable._extend(unsuited, max_count=4)
+            self.flush_lookup.update(flushes)
+            self.unsuited_lookup.update(unsuited)
+
+    @staticmethod
+    def _extend(lookup: dict[int, int], max_count: int) -> dict[int, int]:
+        """
+        Adds one more card to every prime product of the lookup, keeping the
+        best rank for each new product.
+
+        Args:
+            lookup (dict[int, int]): map from prime-product to rank of n card sets
+            max_count (int): max number of cards of the same rank in a set
+        Returns:
+            dict[int, int]: map from prime-product to rank of n+1 card sets
+
+        """
+        extended: dict[int, int] = {}
+        for product, rank in lookup.items():
+            for prime in Card.PRIMES:
+                if product % prime ** max_count:
+                    key = product * prime
+                    if rank < extended.get(key, LookupTable.MAX_HIGH_CARD + 1):
+                        extended[key] = rank
+        return extended
+
     @staticmethod
     def _get_lexographically_next_bit_sequence(bits):
         """
@@ -308,7 +645,14 @@ class LookupTable:
             yield lexo_next
 
 
-LOOKUP_TABLE = LookupTable()
+# 牌力 -> 牌型 / 牌型名称的稠密表, 下标为牌力 (0 不是合法牌力, 对应牌型 0 和空字符串)
+LookupTable.RANK_TO_CLASS = bytes(
+    LookupTable.MAX_TO_RANK_CLASS[min(m for m in LookupTable.MAX_TO_RANK_CLASS if rank <= m)] if rank else 0
+    for rank in range(LookupTable.MAX_HIGH_CARD + 1))
+LookupTable.RANK_TO_STRING = tuple(
+    LookupTable.RANK_CLASS_TO_STRING.get(rank_class, "") for rank_class in LookupTable.RANK_TO_CLASS)
+
+LOOKUP_TABLE = LookupTable.load()
 """
-The lookup table that is created when imported
+The lookup table that is loaded (or created) when imported
 """
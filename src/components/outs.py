@@ -0,0 +1,102 @@
+""" 听牌分析: 下一张牌中哪些能让手牌的牌型变大, 以及变成什么牌型 """
+
+from dataclasses import dataclass, field
+import math
+from typing import Optional
+
+from src.components import Card, Evaluator, LOOKUP_TABLE
+
+
+@dataclass
+class OutsReport:
+    """ 一条街的听牌分析结果 """
+    rank: int                   # 当前的牌力
+    rank_class: int             # 当前的牌型
+    unseen: int                 # 未知的牌数
+    # 每张能改善牌型的牌 -> 它能凑成的、比当前更好的所有牌型 (同花和非同花部分分别判断)
+    outs: dict[Card, frozenset[int]] = field(default_factory=dict)
+
+    def best_class(self, card: Card) -> int:
+        """ 这张牌发出后的牌型 """
+        return min(self.outs[card])
+
+    def by_class(self) -> dict[int, list[Card]]:
+        """ 牌型 -> 能凑成该牌型的牌, 一张牌可以同时属于多个牌型 (如同时凑成同花和顺子) """
+        classes: dict[int, list[Card]] = {}
+        for card, made in self.outs.items():
+            for rank_class in made:
+                classes.setdefault(rank_class, []).append(card)
+        return dict(sorted(classes.items()))
+
+    @property
+    def overlapping(self) -> list[Card]:
+        """ 同时属于多个牌型的牌 """
+        return [card for card, made in self.outs.items() if len(made) > 1]
+
+    @property
+    def probability(self) -> float:
+        """ 下一张牌改善牌型的概率 """
+        return len(self.outs) / self.unseen if self.unseen else 0.
+
+    def summary(self) -> str:
+        """ 例如 "9 flush outs, 6 straight outs, 2 overlapping" """
+        parts = [f"{len(cards)} {LOOKUP_TABLE.RANK_CLASS_TO_STRING[rank_class].lower()} outs"
+                 for rank_class, cards in self.by_class().items()]
+        if self.overlapping:
+            parts.append(f"{len(self.overlapping)} overlapping")
+        return ", ".join(parts) if parts else "no outs"
+
+
+class OutsAnalyzer:
+    """
+    Evaluates every unseen card from one shared partial state of hand + board,
+    instead of a full evaluation per card.
+
+    """
+
+    @staticmethod
+    def analyze(hand: list[Card], board: list[Card], dead: Optional[list[Card]] = None) -> OutsReport:
+        """
+        Finds the cards that improve the rank class of a hand on the next street.
+
+        Args:
+            hand (list[Card]): The two hole cards.
+            board (list[Card]): The board, 3 or 4 cards.
+            dead (list[Card]): Other cards known to be out of the deck.
+        Returns:
+            OutsReport: The current rank and the classes each out makes.
+
+        """
+        if len(board) not in (3, 4):
+            raise ValueError(f"Outs need a flop or a turn, {len(board)} board cards found.")
+        known = list(hand) + list(board) + list(dead or [])
+        if len(set(known)) != len(known):
+            raise ValueError(f"Duplicate cards found: {known}")
+
+        cards = list(hand) + list(board)
+        rank = Evaluator._seven(cards)
+        rank_class = Evaluator.get_rank_class(rank)
+        prime, counter = Evaluator.get_partial_state(cards)
+        counter += Evaluator.SUIT_COUNTER_INIT
+        known_mask = Card.cards_to_mask(known)
+        unseen = [card for card in Card.CARDS if not known_mask >> card.index & 1]
+
+        report = OutsReport(rank, rank_class, len(unseen))
+        flush_lookup, unsuited_lookup = LOOKUP_TABLE.flush_lookup, LOOKUP_TABLE.unsuited_lookup
+        # 每种花色的素数积, 凑成同花时只需再乘上新牌
+        suit_primes = {suit: math.prod(c & 0x3F for c in cards if c & suit)
+                       for suit in Evaluator.FLUSH_BIT_TO_SUIT.values()}
+        for card in unseen:
+            made = set()
+            card_counter = counter + Evaluator.SUIT_TO_COUNTER[(card >> 12) & 0xF]
+            if card_counter & Evaluator.SUIT_COUNTER_FLUSH:
+                suit = Evaluator.FLUSH_BIT_TO_SUIT[card_counter & Evaluator.SUIT_COUNTER_FLUSH]
+                flush_prime = suit_primes[suit]
+                if card & suit:
+                    flush_prime *= card & 0x3F
+                made.add(Evaluator.get_rank_class(flush_lookup[flush_prime]))
+            made.add(Evaluator.get_rank_class(unsuited_lookup[prime * (card & 0x3F)]))
+            made = {k for k in made if k < rank_class}
+            if made:
+                report.outs[card] = frozenset(made)
+        return report
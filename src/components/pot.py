@@ -16,3 +16,12 @@ class Pot:
 
     def remove_player(self, player):
         self.eligible_players.remove(player) # or discard()
+
+
+@dataclass
+class PotResult:
+    """ 一个底池的结算结果 """
+    amount: int
+    eligible_players: set["Player"]  # type: ignore
+    winners: list["Player"]  # type: ignore
+    splits: dict["Player", int] = field(default_factory=dict)  # type: ignore
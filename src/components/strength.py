@@ -0,0 +1,220 @@
+"""
+牌力分布与手牌潜力:
+    7张牌的牌力频率表 (52选7 的全部组合中每个牌力出现的次数) 和由此得到的百分位;
+    对随机对手的手牌强度 HS 与潜力 PPot / NPot (Billings 等人的定义), 按公共牌缓存对手的所有可能
+"""
+
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+import itertools
+import math
+from typing import Optional
+
+from src.components import Card, Evaluator, LOOKUP_TABLE
+
+
+@dataclass
+class StrengthResult:
+    """ 手牌强度和潜力 """
+    hs: float           # 当前领先 N 位随机对手的概率 (平局算一半)
+    ppot: float         # 当前落后或平局, 发完公共牌后反超的概率
+    npot: float         # 当前领先或平局, 发完公共牌后被反超的概率
+    opponents: int = 1
+
+    @property
+    def ehs(self) -> float:
+        """ 有效手牌强度: 领先, 或者落后但会反超 """
+        return self.hs + (1 - self.hs) * self.ppot
+
+
+class BoardTable:
+    """
+    一组公共牌上所有可能的手牌与发牌:
+        current[i]      第 i 种手牌在当前公共牌上的牌力
+        final[i, j]     第 i 种手牌在第 j 种发牌之后的牌力, 0 表示手牌与发牌冲突
+    """
+
+    def __init__(self, board: tuple[Card, ...], chunk_rows: int = 1 << 16) -> None:
+        import numpy as np
+
+        self.board = board
+        board_mask = Card.cards_to_mask(board)
+        stock = [card for card in Card.CARDS if not board_mask >> card.index & 1]
+        holes = list(itertools.combinations(stock, 2))
+        runouts = list(itertools.combinations(stock, 5 - len(board)))
+
+        self.holes = np.array(holes, dtype=np.int64)
+        self.hole_masks = np.array([Card.cards_to_mask(hole) for hole in holes], dtype=np.int64)
+        self.runout_masks = np.array([Card.cards_to_mask(runout) for runout in runouts], dtype=np.int64)
+        self.index = {mask: i for i, mask in enumerate(self.hole_masks.tolist())}
+
+        board_array = np.array(board, dtype=np.int64)
+        self.current = Evaluator.evaluate_batch(
+            self.holes, np.broadcast_to(board_array, (len(holes), len(board)))).astype(np.int16)
+
+        # 按手牌分块求值, 只计算不冲突的组合
+        runout_cards = np.array(runouts, dtype=np.int64).reshape(len(runouts), -1)
+        full_boards = np.concatenate(
+            [np.broadcast_to(board_array, (len(runouts), len(board))), runout_cards], axis=1)
+        self.final = np.zeros((len(holes), len(runouts)), dtype=np.int16)
+        step = max(1, chunk_rows // len(runouts))
+        for start in range(0, len(holes), step):
+            block = slice(start, start + step)
+            rows, cols = np.nonzero((self.hole_masks[block, None] & self.runout_masks[None, :]) == 0)
+            self.final[block][rows, cols] = Evaluator.evaluate_batch(self.holes[block][rows], full_boards[cols])
+
+    @property
+    def nbytes(self) -> int:
+        return self.final.nbytes
+
+
+class HandStrength:
+    """ 手牌强度计算器, 同一组公共牌的所有决策共用一张 BoardTable """
+    # 52选7 的全部组合中每个牌力的出现次数, 与比该牌力更差的组合数, 第一次使用时计算
+    _frequencies: Optional[array] = None
+    _worse: Optional[array] = None
+
+    def __init__(self, cache_size: int = 16) -> None:
+        """
+        @args:
+            cache_size: 缓存的公共牌数量, 翻牌的一张表约 2.8MB
+        """
+        self.cache_size = cache_size
+        self._tables: OrderedDict[tuple[Card, ...], BoardTable] = OrderedDict()
+
+    @staticmethod
+    def rank_frequencies() -> array:
+        """
+        The number of 7 card hands of each rank, indexed by rank (index 0 is unused).
+        Computed from rank multisets and suit patterns instead of the 133,784,560 hands.
+
+        Returns:
+            array: 7463 counts summing to C(52, 7).
+
+        """
+        if HandStrength._frequencies is not None:
+            return HandStrength._frequencies
+        counts = array("q", bytes(8 * (LOOKUP_TABLE.MAX_HIGH_CARD + 1)))
+
+        # 同花: 7张牌中至多一种花色凑够5张, 此时同花一定是最大的牌型, 其余的牌任意
+        for suited in range(5, 8):
+            others = 4 * math.comb(39, 7 - suited)
+            for ranks in itertools.combinations(Card.PRIMES, suited):
+                counts[LOOKUP_TABLE.flush_lookup[math.prod(ranks)]] += others
+
+        # 非同花: 对每个点数多重集, 花色分配的总数减去含有同花的分配数
+        def multisets(rank: int, left: int, prime: int, chosen: tuple[int, ...]):
+            if rank == 13:
+                if not left:
+                    yield prime, chosen
+                return
+            for count in range(min(4, left) + 1):
+                yield from multisets(rank + 1, left - count, prime * Card.PRIMES[rank] ** count,
+                                     chosen + (count,) if count else chosen)
+
+        for prime, chosen in multisets(0, 7, 1, ()):
+            total = math.prod(math.comb(4, count) for count in chosen)
+            # poly[k]: 某一种花色恰好有 k 张时的分配数
+            poly = [1]
+            for count in chosen:
+                without, with_suit = math.comb(3, count), math.comb(3, count - 1)
+                poly = [(poly[k] if k < len(poly) else 0) * without
+                        + (poly[k - 1] * with_suit if k else 0) for k in range(len(poly) + 1)]
+            counts[LOOKUP_TABLE.unsuited_lookup[prime]] += total - 4 * sum(poly[5:])
+
+        worse = array("q", counts)
+        running = 0
+        for rank in range(LOOKUP_TABLE.MAX_HIGH_CARD, -1, -1):
+            worse[rank] = running
+            running += counts[rank]
+        HandStrength._frequencies, HandStrength._worse = counts, worse
+        return counts
+
+    @staticmethod
+    def percentile(hand_rank: int) -> float:
+        """
+        The share of all 7 card hands that are worse than the given rank, unlike
+        :meth:`Evaluator.get_five_card_rank_percentage` it follows the real frequencies.
+
+        Args:
+            hand_rank (int): The rank of the hand given by :meth:`Evaluator.evaluate`
+        Returns:
+            float: The percentile of the rank among 7 card hands.
+
+        """
+        HandStrength.rank_frequencies()
+        return HandStrength._worse[hand_rank] / math.comb(52, 7)  # type: ignore
+
+    def table(self, board: list[Card]) -> BoardTable:
+        """ 公共牌对应的表, 与顺序无关 """
+        key = tuple(sorted(board))
+        table = self._tables.get(key)
+        if table is None:
+            table = BoardTable(key)
+            self._tables[key] = table
+            while len(self._tables) > self.cache_size:
+                self._tables.popitem(last=False)
+        else:
+            self._tables.move_to_end(key)
+        return table
+
+    def clear(self) -> None:
+        self._tables.clear()
+
+    def calculate(self,
+                  hand: list[Card],
+                  board: list[Card],
+                  opponents: int = 1,
+                  dead: Optional[list[Card]] = None) -> StrengthResult:
+        """
+        Hand strength and potential against random opponents, enumerating every
+        opponent hand and every runout.
+
+        HS against N opponents is HS ** N, the potentials are computed against
+        one opponent as in the original definition.
+
+        Args:
+            hand (list[Card]): The two hole cards.
+            board (list[Card]): The board, 3 to 5 cards.
+            opponents (int): The number of opponents.
+            dead (list[Card]): Other cards known to be out of the deck.
+        Returns:
+            StrengthResult: HS, PPot and NPot.
+
+        """
+        import numpy as np
+
+        if not 3 <= len(board) <= 5:
+            raise ValueError(f"Hand strength needs 3 to 5 board cards, {len(board)} found.")
+        known = list(hand) + list(board) + list(dead or [])
+        if len(hand) != 2 or len(set(known)) != len(known):
+            raise ValueError(f"Invalid hand or duplicate cards: {known}")
+
+        table = self.table(board)
+        hero = table.index[Card.cards_to_mask(hand)]
+        blocked = Card.cards_to_mask(hand) | Card.cards_to_mask(dead or [])
+        opponent_rows = np.flatnonzero((table.hole_masks & blocked) == 0)
+        runout_cols = np.flatnonzero((table.runout_masks & blocked) == 0)
+
+        # 牌力越小越好: 对手牌力更大时领先
+        current = table.current[opponent_rows]
+        state = np.where(current > table.current[hero], 0, np.where(current == table.current[hero], 1, 2))
+        now = np.bincount(state, minlength=3)
+        hs = (now[0] + now[1] / 2) / len(opponent_rows)
+
+        final = table.final[np.ix_(opponent_rows, runout_cols)]
+        hero_final = table.final[hero, runout_cols]
+        valid = final != 0
+        later = [((final > hero_final) & valid).sum(axis=1),
+                 (final == hero_final).sum(axis=1),
+                 ((final < hero_final) & valid).sum(axis=1)]
+        # hp[当前][最终], 当前和最终都按 领先/平局/落后 排列
+        hp = np.array([np.bincount(state, weights=counts, minlength=3) for counts in later]).T
+        totals = hp.sum(axis=1)
+        ahead, tied, behind = 0, 1, 2
+        ppot_base = totals[behind] + totals[tied] / 2
+        npot_base = totals[ahead] + totals[tied] / 2
+        ppot = (hp[behind, ahead] + hp[behind, tied] / 2 + hp[tied, ahead] / 2) / ppot_base if ppot_base else 0.
+        npot = (hp[ahead, behind] + hp[tied, behind] / 2 + hp[ahead, tied] / 2) / npot_base if npot_base else 0.
+        return StrengthResult(float(hs ** opponents), float(ppot), float(npot), opponents)
@@ -4,10 +4,12 @@ import gc
 import math
 import time
 import random
-from typing import Optional
+from typing import Callable, Generator, Optional
 
-from src.components import Action, Deck, Move, Street, Evaluator, Position
-from src.gamer import Player, PotManager
+from src.components import Action, Deck, Move, Street, Evaluator, Position, PotResult
+from src.farm import TableFarm
+from src.gamer import BotPlayer, GameState, Player, PotManager, Strategy
+from src.history import ACTION_CODES, Event, EventStream, EventType
 
 
 class Dealer:
@@ -16,13 +18,41 @@ class Dealer:
     def __init__(self, 
                  players: list, 
                  big_blind: int = 20, 
-                 small_blind: int = 0) -> None:
-        random.shuffle(players)  # 随机打乱玩家顺序
+                 small_blind: int = 0,
+                 strategy: Optional[Callable[[Player, "Dealer"], Optional[int]]] = None,
+                 headless: bool = False,
+                 events: Optional[EventStream] = None,
+                 seed: Optional[int] = None,
+                 table: int = 0) -> None:
+        """
+        @args:
+            strategy: 非机器人玩家的决策函数 strategy(player, dealer) -> 下注量,
+                      与 get_player_bet 的返回值含义相同。给定时自动进入无界面模式
+            headless: 无界面模式, 不渲染、不强制GC (机器人牌桌不需要strategy)
+            events: 记录牌局历史的事件流
+            seed: 牌桌自己的随机种子, 决定座位和每一手牌的洗牌; 默认随机生成, 保存在self.seed中以便重现
+            table: 牌桌编号, 多张牌桌共用一个事件流时必须各不相同
+        """
+        self.seed = seed if seed is not None else random.randrange(1 << 63)
+        self.rng = random.Random(self.seed)
+        # 重现牌桌需要打乱前的入座顺序和筹码
+        self.initial_seats = tuple((player.name, player.money) for player in players)
+        self.rng.shuffle(players)  # 随机打乱玩家顺序
+        self._deck = Deck(self.rng)
         self.player_queue = deque(players)
         # self.player_list: list[Player] = players
         self.big_blind = big_blind
         self.small_blind = small_blind if small_blind else math.ceil(self.big_blind / 2)
         self.pot_manager = PotManager()
+        self.strategy = strategy
+        self.headless = headless or strategy is not None
+        # 当前下注圈的状态, 供决策函数读取
+        self.street: Optional[Street] = None
+        self.current_bet = 0
+        self.min_raise = 0
+        self.events = events
+        self.table = table
+        self.hand_id = 0
 
     # 发牌函数
     def deal_cards(self, number) -> list:
@@ -39,8 +69,70 @@ class Dealer:
         # TODO 完善play 的功能
         
         while len(self.player_queue) > 1:
-            self.reset_deck()
+            Dealer.drive(self.hand_steps(), self.decide)
+            input("Press Enter to continue...")
+        print(f"  Winner: {self.player_queue.pop()}  ".center(68, "!"))
+
+    def run(self, hands: Optional[int] = None) -> int:
+        """ 连续进行hands手牌(默认直到只剩一位玩家), 中间不等待确认, 返回实际进行的手数 """
+        return Dealer.drive(self.session_steps(hands), self.decide)
+
+    @staticmethod
+    def run_batch(dealers: list["Dealer"], hands: Optional[int] = None) -> int:
+        """
+        批量模式: 交替推进多张牌桌, 把所有等待机器人决策的请求按策略合并,
+        每个策略每轮只调用一次 decide_batch。返回所有牌桌进行的总手数
+        """
+        return TableFarm(dealers, hands).run().hands
+
+    def decide(self, player: Player) -> Optional[int]:
+        """ 获取玩家的下注量: 机器人由自己的策略决定, 其余玩家由strategy或终端输入决定 """
+        if isinstance(player, BotPlayer):
+            state = self.game_state(player)
+            return Strategy.to_amount(player.strategy.decide(state), state)
+        if self.strategy is not None:
+            return self.strategy(player, self)
+        return self.get_player_bet(player)
+
+    def game_state(self, player: Player) -> GameState:
+        """ 轮到player行动时的只读牌局视图 """
+        board = tuple(card for cards in self.community_cards.values()
+                      for card in cards if card != '??')
+        return GameState(street=self.street,  # type: ignore
+                         hand=tuple(player.hand),  # type: ignore
+                         board=board,
+                         position=player.position,
+                         money=player.money,
+                         bet=player.current_bet,
+                         current_bet=self.current_bet,
+                         min_raise=self.min_raise,
+                         pot=self.pot_manager.get_total_chips(),
+                         players=sum(p.action != Action.FOLD for p in self.player_queue),
+                         big_blind=self.big_blind)
+
+    def session_steps(self, hands: Optional[int] = None) -> Generator[Player, Optional[int], int]:
+        """ 连续多手牌的流程生成器, 返回实际进行的手数 """
+        played = 0
+        while len(self.player_queue) > 1 and (hands is None or played < hands):
+            yield from self.hand_steps()
+            played += 1
+        return played
+
+    @staticmethod
+    def drive(steps: Generator[Player, Optional[int], bool], decide: Callable[[Player], Optional[int]]) -> bool:
+        """ 驱动一个流程生成器: 每当它需要玩家决策时调用decide, 并把下注量传回 """
+        try:
+            player = next(steps)
+            while True:
+                player = steps.send(decide(player))
+        except StopIteration as stop:
+            return stop.value
+
+    def hand_steps(self) -> Generator[Player, Optional[int], bool]:
+        """ 一手牌的完整流程, 每当需要玩家决策时yield该玩家, 由驱动者send回下注量 """
+        self.reset_deck()
 
+        if not self.headless:
             # 睡眠机制
             print(f"Players on Board:")
             print("\n".join('\t'.join([str(p), str(p.money)]) 
@@ -49,28 +141,35 @@ class Dealer:
                 print("\rLoading" + "." * i, end='', flush=True)
                 # time.sleep(1)
 
-            for street in Street:
-                # 如果是翻前，则给每个人发手牌
-                if street == Street.PRE_FLOP:
-                    self.set_positions()
-                    self.deal_preflop()
-                else:
-                    # 确定本轮要发的公共牌张数
-                    card_num = 3 if street == Street.FLOP else 1
-                    self.community_cards[street] = self.deal_cards(card_num)
-
-                self.refresh_screen()
-                self.betting_round(street)  # 可能中途结束
+        for street in Street:
+            # 如果是翻前，则给每个人发手牌
+            if street == Street.PRE_FLOP:
+                self.set_positions()
+                self.deal_preflop()
+                self.record_deal()
+            else:
+                # 确定本轮要发的公共牌张数
+                card_num = 3 if street == Street.FLOP else 1
+                self.community_cards[street] = self.deal_cards(card_num)
+                self.record(EventType.BOARD, street=street.value.order,
+                            cards=tuple(self.community_cards[street]))
 
-            # 河牌圈结束 或中途结束
             self.refresh_screen()
-            self.eval_hands()
-            self.kickoff_losers()
-            input("Press Enter to continue...")
-        print(f"  Winner: {self.player_queue.pop()}  ".center(68, "!"))
+            yield from self.betting_steps(street)  # 可能中途结束
+
+        # 河牌圈结束 或中途结束
+        self.refresh_screen()
+        self.eval_hands()
+        self.kickoff_losers()
+        return True
 
     def betting_round(self, street: Street) -> bool:
         """ 一局中的一圈游戏 返回True则没有中途结束 返回False则中途结束游戏"""
+        # 与 hand_steps 一样由 decide 决策, 无界面模式和机器人不会调用 input()
+        return Dealer.drive(self.betting_steps(street), self.decide)
+
+    def betting_steps(self, street: Street) -> Generator[Player, Optional[int], bool]:
+        """ betting_round 的生成器版本: yield需要行动的玩家, 由驱动者send回下注量 """
         # 每一圈之后重置 如果有盲注，则starting_bet不为0
         current_bet = 0   
         min_raise = 0
@@ -81,7 +180,6 @@ class Dealer:
         if len(action_queue) == 1: 
             # 只有一位可以行动的玩家，则直接进入河牌圈比大小
             return True
-        betted_players = set(active_players)
         if street == Street.PRE_FLOP:
             # 翻前圈，给盲位玩家下注
             rotate_num = self.blind_players_bet(action_queue)
@@ -100,9 +198,19 @@ class Dealer:
             if player is last_raiser:
                 continue # 这里continue 和break的作用是一样的
 
-            amount = self.get_player_bet(player)
+            self.street, self.current_bet, self.min_raise = street, current_bet, min_raise
+            amount = yield player
+            bet_before = player.current_bet
             move: Move = player.bet(amount=amount, street=street,
                                     current_bet=current_bet, min_raise=min_raise)
+            self.pot_manager.add_bet(player, player.current_bet - bet_before)
+            self.record(EventType.MOVE, player, street=street.value.order,
+                        action=ACTION_CODES[move.action], amount=move.amount)
+            if move.action == Action.FOLD:
+                self.pot_manager.fold(player)
+                if sum(p.action != Action.FOLD for p in self.player_queue) == 1:
+                    # 其余玩家都已弃牌, 最后一位玩家不需要再行动
+                    break
 
             # 如果玩家加注，则重置队列，让其他玩家有机会相应
             if move.amount > current_bet:
@@ -117,8 +225,8 @@ class Dealer:
             # 根据行动更新 current_bet, min_raise 等
             current_bet, min_raise = self.examine_player_move(move, current_bet, min_raise)
             self.refresh_screen()  # 刷新屏幕，并且也要覆盖掉之前人的手牌和输入的内容
-        
-        self.pot_manager.update_pots(betted_players)
+
+        self.record(EventType.POT, street=street.value.order, amount=self.pot_manager.get_total_chips())
 
         # 重置玩家的当前下注额
         for player in active_players:
@@ -158,6 +266,9 @@ class Dealer:
             amount = self.small_blind
         sb_player.bet(amount=amount, street=Street.PRE_FLOP,
                         current_bet=0, min_raise=0)
+        self.pot_manager.add_bet(sb_player, sb_player.current_bet)
+        self.record(EventType.BLIND, sb_player, street=Street.PRE_FLOP.value.order,
+                    amount=sb_player.current_bet)
 
         # 如果小盲或大盲必须all-in，则移除他们的行动权
         if bb_player.money <= self.big_blind:
@@ -168,6 +279,9 @@ class Dealer:
             amount = self.big_blind
         bb_player.bet(amount=amount, street=Street.PRE_FLOP,
                                     current_bet=0, min_raise=0)
+        self.pot_manager.add_bet(bb_player, bb_player.current_bet)
+        self.record(EventType.BLIND, bb_player, street=Street.PRE_FLOP.value.order,
+                    amount=bb_player.current_bet)
 
         return rotate_num
     
@@ -230,53 +344,62 @@ class Dealer:
         print('  '.join([bottom_lines for _ in card_list]).center(76, ' '))
 
     def eval_hands(self):
-        """ 计算全部玩家的手牌大小 """
-        # 逐个地将玩家的手牌传入evaluator.evaluate_hand()当中
-        print("\n", "  Showdown!  ".center(76, "·"), "\n", sep='')
-        player_hand_info = []
+        """ 计算全部摊牌玩家的手牌大小并结算底池, 返回每个底池的结算结果 """
         board = list(chain.from_iterable(
             cards for cards in self.community_cards.values()))
+        players = [player for player in self.player_queue if player.action != Action.FOLD]
+        # 公共牌的部分只计算一次, 每位玩家只需加上自己的两张牌
+        ranks = Evaluator.rank_hands([player.hand for player in players], board)  # type: ignore
+        player_hand_info = []
+        for player, hand_rank in zip(players, ranks):
+            player_hand_info.append((player, hand_rank))
+            self.record(EventType.SHOWDOWN, player, amount=hand_rank, cards=tuple(player.hand))
+
+        results = self.find_winners(player_hand_info)  # 数字小的手牌大
+        if self.headless:
+            return results
+        winners = {player for result in results for player, chips in result.splits.items() if chips}
+        print("\n", "  Showdown!  ".center(76, "·"), "\n", sep='')
+        for player, hand_rank in player_hand_info:
+            player.show_hand(winner=player in winners)
+            # 最大的5张牌按牌型的重要程度排列, 描述包含踢脚
+            combo = Evaluator.get_best_combo(player.hand + board, hand_rank)  # type: ignore
+            print(" ".join(map(str, combo)), Evaluator.describe(hand_rank), sep='\t\t')
+        return results
+
+    def find_winners(self, player_hand_info) -> list[PotResult]:
+        """ 一次结算所有底池并分配筹码, 返回每个底池的胜者和分配 """
+        ranks = {player: hand_rank for player, hand_rank, *_ in player_hand_info}
+        # 零头筹码从庄家左手边开始分配
+        order = sorted(ranks, key=lambda p: (p.position == Position.BTN, p.position.value))
+        results = self.pot_manager.resolve(ranks, order)
+        payouts = dict.fromkeys(ranks, 0)
+        for result in results:
+            for player, chips in result.splits.items():
+                payouts[player] += chips
+        for player, chips in payouts.items():
+            player.add_chips(chips)
+            if chips:
+                self.record(EventType.PAYOUT, player, amount=chips)
+        return results
+
+    def record(self, type: EventType, player: Optional[Player] = None, **fields) -> None:
+        """ 向事件流记录一条事件, 没有事件流时什么都不做 """
+        if self.events is not None:
+            seat = player.position.value if player is not None else -1
+            self.events.emit(Event(self.hand_id, type, seat, table=self.table, **fields))
+
+    def record_deal(self):
+        """ 记录新一手牌的座位、筹码和手牌 """
+        self.hand_id += 1
+        if self.events is None:
+            return
+        self.record(EventType.HAND, amount=self.big_blind)
         for player in self.player_queue:
-            if player.action != Action.FOLD:
-                # hand_rank, rank_string, combo = Evaluator.evaluate(player.hand, board)  # type: ignore
-                info = Evaluator.evaluate(player.hand, board)  # type: ignore
-                player_hand_info.append((player, *info))
-
-        winners = self.find_winners(player_hand_info)  # 找出胜者 ,数字小的手牌大
-        for info in player_hand_info:
-            player, hand_rank, rank_string, combo = info
-            is_winner = True if player in winners else False
-            player.show_hand(winner=is_winner)
-            print(" ".join(map(str, sorted(combo, reverse=True))), rank_string, sep='\t\t')
-
-
-    def find_winners(self, player_hand_info):
-        ranked_players = sorted(player_hand_info, key=lambda x: x[1])
-        winners = []
-        # 处理每个底池
-        for pot in self.pot_manager.pots:
-            # 在这个底池中找到有资格赢得底池的玩家
-            eligible_players: list[Player] = [player for player, *_ in ranked_players 
-                                              if player in pot.eligible_players]
-
-            # 如果没有资格的玩家，跳过这个底池
-            # 我们经常会创建很多空底池，所以需要这个保护机制
-            if not eligible_players:
-                continue
-
-            # 找出这个底池的最大牌力和对应的玩家
-            max_hand_rank = min(hand_rank for p, hand_rank, *_ in player_hand_info 
-                                if p in eligible_players)
-            winners: list[Player] = [player for player, hand_rank, *_ in player_hand_info 
-                       if hand_rank == max_hand_rank and player in eligible_players]
-            # pot_winners[pot] = winners
-            # 处理底池的分配
-            # 分配底池筹码给胜者
-            for winner in winners:
-                winner.add_chips(round(pot.amount / len(winners)))
-        # 返回底池胜者信息
-        return winners
-    
+            self.record(EventType.SEAT, player, amount=player.money, name=player.name)
+        for player in self.player_queue:
+            self.record(EventType.HOLE, player, cards=tuple(player.hand))
+
     def kickoff_losers(self):
         """ 踢掉破产玩家 """
         losers = [p for p in self.player_queue if p.money == 0]
@@ -298,6 +421,8 @@ class Dealer:
     def refresh_screen(self):
         # 清除屏幕（终端命令）
         # TODO 美化格式化输出
+        if self.headless:
+            return
         print("\033[H\033[J", end="")  # 这是清屏的ANSI转义码
         print("\n","     THU Unlimited Texas Hold'em Cash Game Table     ".center(76, '='),"\n",sep="")
         self.show_community_cards()
@@ -319,7 +444,7 @@ class Dealer:
     def reset_deck(self):
         """ 重置牌桌 """
         # 完善销毁机制，记得清空玩家的可变游戏信息
-        self._deck = Deck()
+        self._deck.reset()
         self.community_cards = {Street.FLOP: ['??'] * 3,
                                 Street.TURN: ['??'],
                                 Street.RIVER: ['??']}
@@ -331,7 +456,8 @@ class Dealer:
             player.reset_current_bet()
             player.reset_position()
 
-        gc.collect()
+        if not self.headless:
+            gc.collect()
 
 
 if __name__ == '__main__':
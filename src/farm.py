@@ -0,0 +1,161 @@
+""" 多牌桌调度器: 在一个进程里交替推进成千上万张无界面牌桌 """
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass, field
+import time
+import typing
+from typing import Callable, Generator, Optional
+
+from src.gamer import BotPlayer, GameState, Player, Strategy, ThreadedStrategy
+if typing.TYPE_CHECKING:
+    from src.dealer import Dealer
+
+
+@dataclass
+class TableStats:
+    """ 单张牌桌的统计 """
+    hands: int = 0
+    decisions: int = 0          # 机器人决策次数
+    parked: int = 0             # 等待慢策略的次数
+    parked_seconds: float = 0.  # 等待慢策略的总时长
+    finished: bool = False
+
+
+@dataclass
+class FarmStats:
+    """ 整个牌桌群的统计 """
+    tables: list[TableStats] = field(default_factory=list)
+    seconds: float = 0.
+
+    @property
+    def hands(self) -> int:
+        return sum(stats.hands for stats in self.tables)
+
+    @property
+    def decisions(self) -> int:
+        return sum(stats.decisions for stats in self.tables)
+
+    @property
+    def hands_per_second(self) -> float:
+        return self.hands / self.seconds if self.seconds else 0.
+
+
+class Table:
+    """ 调度器中的一张牌桌: 荷官 + 多手牌的流程生成器 + 统计 """
+
+    def __init__(self, dealer: "Dealer", hands: Optional[int] = None) -> None:
+        self.dealer = dealer
+        self.stats = TableStats()
+        self.steps = self._session(hands)
+        self.parked_at = 0.
+
+    def _session(self, hands: Optional[int]) -> Generator[Player, Optional[int], None]:
+        """ 连续进行hands手牌(默认直到只剩一位玩家) """
+        dealer, stats = self.dealer, self.stats
+        while len(dealer.player_queue) > 1 and (hands is None or stats.hands < hands):
+            yield from dealer.hand_steps()
+            stats.hands += 1
+        stats.finished = True
+
+
+class TableFarm:
+    """
+    牌桌群调度器。每轮把所有牌桌推进到下一个机器人决策, 按策略合并成一次 decide_batch;
+    ThreadedStrategy 等慢策略在后台线程决策, 等待中的牌桌让出调度, 其余牌桌继续进行
+    """
+
+    def __init__(self,
+                 dealers: list["Dealer"],
+                 hands: Optional[int] = None,
+                 progress: Optional[Callable[[FarmStats], None]] = None,
+                 progress_interval: float = 1.) -> None:
+        """
+        @args:
+            hands: 每张牌桌进行的手数, 默认直到只剩一位玩家
+            progress: 每隔progress_interval秒调用一次, 用于输出全局 hands/sec
+        """
+        # 共用一个事件流的牌桌必须有不同的编号, 否则各自的事件无法区分
+        seen = set()
+        for dealer in dealers:
+            if dealer.events is not None:
+                key = (id(dealer.events), dealer.table)
+                if key in seen:
+                    raise ValueError(f"Tables sharing an event stream need distinct table ids, "
+                                     f"{dealer.table} is used twice.")
+                seen.add(key)
+        self.tables = [Table(dealer, hands) for dealer in dealers]
+        self.stats = FarmStats([table.stats for table in self.tables])
+        self.progress = progress
+        self.progress_interval = progress_interval
+
+    def run(self) -> FarmStats:
+        """ 运行直到所有牌桌结束, 返回统计 """
+        start = last_report = time.perf_counter()
+        ready: deque[tuple[Table, Optional[int]]] = deque((table, None) for table in self.tables)
+        waiting: list[tuple[Table, BotPlayer]] = []
+        parked: dict[Future, list[tuple[Table, GameState]]] = {}
+
+        while ready or parked:
+            # 推进所有就绪的牌桌, 直到它们各自需要机器人决策
+            while ready:
+                table, amount = ready.popleft()
+                player = self._advance(table, amount)
+                if player is not None:
+                    waiting.append((table, player))
+
+            # 按策略合并决策请求
+            requests: dict[Strategy, list[tuple[Table, GameState]]] = {}
+            for table, player in waiting:
+                requests.setdefault(player.strategy, []).append((table, table.dealer.game_state(player)))
+                table.stats.decisions += 1
+            waiting.clear()
+            for strategy, batch in requests.items():
+                states = [state for _, state in batch]
+                if isinstance(strategy, ThreadedStrategy):
+                    parked[strategy.submit_batch(states)] = batch
+                    now = time.perf_counter()
+                    for table, _ in batch:
+                        table.stats.parked += 1
+                        table.parked_at = now
+                else:
+                    TableFarm._resume(ready, batch, strategy.decide_batch(states))
+
+            # 取回已完成的慢策略; 没有其他牌桌可推进时才阻塞等待
+            if parked:
+                if ready:
+                    done = [future for future in parked if future.done()]
+                else:
+                    done, _ = wait(parked, return_when=FIRST_COMPLETED)
+                now = time.perf_counter()
+                for future in done:
+                    batch = parked.pop(future)
+                    for table, _ in batch:
+                        table.stats.parked_seconds += now - table.parked_at
+                    TableFarm._resume(ready, batch, future.result())
+
+            if self.progress is not None and time.perf_counter() - last_report >= self.progress_interval:
+                last_report = time.perf_counter()
+                self.stats.seconds = last_report - start
+                self.progress(self.stats)
+
+        self.stats.seconds = time.perf_counter() - start
+        return self.stats
+
+    @staticmethod
+    def _advance(table: Table, amount: Optional[int]) -> Optional[BotPlayer]:
+        """ 推进牌桌直到下一个机器人需要决策, 其余玩家同步决策; 牌桌结束时返回None """
+        dealer = table.dealer
+        try:
+            player = table.steps.send(amount)
+            while not isinstance(player, BotPlayer):
+                player = table.steps.send(dealer.decide(player))
+            return player
+        except StopIteration:
+            return None
+
+    @staticmethod
+    def _resume(ready: deque, batch: list[tuple[Table, GameState]], moves: list) -> None:
+        """ 把策略的行动转换成下注量, 牌桌重新进入就绪队列 """
+        for (table, state), move in zip(batch, moves):
+            ready.append((table, Strategy.to_amount(move, state)))
@@ -1,4 +1,5 @@
-from .player import Player
+from .player import Player, BotPlayer, RemotePlayer
+from .strategy import GameState, Strategy, RandomStrategy, ThreadedStrategy
 from .pot_manager import PotManager
 from ..components.evaluator import Evaluator
 from ..components.helper import Helper
\ No newline at end of file
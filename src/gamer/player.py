@@ -2,12 +2,14 @@
 
 
 from collections import defaultdict
-import gc
 from copy import deepcopy
+import typing
 from typing import Optional
 
 from src.components import Street, Action, Move, Hand, Position
 from src.components.position import Position
+if typing.TYPE_CHECKING:
+    from src.gamer.strategy import Strategy
 
 
 class Player:
@@ -128,7 +130,6 @@ class Player:
         self._bet_history = defaultdict(list)
         self._aciton = None
         self._current_bet = 0
-        gc.collect()
 
     def set_position(self, pos: Position):
         self._position = pos
@@ -189,6 +190,19 @@ class Player:
     def position(self):
         return self._position
 
+
+
+class BotPlayer(Player):
+    """ 机器人玩家: 由策略根据只读的牌局视图 GameState 决定行动 """
+
+    def __init__(self, name: str, strategy: "Strategy", money: Optional[int] = None) -> None:
+        super().__init__(name, money)
+        self.strategy = strategy
+
+
+class RemotePlayer(Player):
+    """ 远程玩家: 行动通过 TableServer 的本地socket连接到达 """
+
     
 if __name__ == '__main__':
     print(Action.FOLD.value)
@@ -1,65 +1,125 @@
+""" 彩池管理 """
 
-
-from src.components import Move, Action, Pot
+from src.components import Pot, PotResult
 import typing
 if typing.TYPE_CHECKING:
     from src.gamer import Player
 
 
 class PotManager:
-    """ 彩池管理员 """
-    # 可以尝试新建一个专门处理一轮上all-in数额的数据结构，在一条街结束时再处理底池
+    """
+    彩池管理员
+    下注时只增量记录每位玩家本手牌投入的筹码总量, 主池和边池由投入的层级在需要时计算:
+    每个未弃牌玩家的不同投入额构成一个层级, 相邻层级之间的筹码构成一个底池,
+    有资格的玩家集合相同的筹码天然合并在同一个底池中, 不会产生空底池
+    """
+
     def __init__(self):
-        # 至少有一个主池
-        self.pots:list[Pot] = [Pot()]
-        return
-        
-    def update_pots(self, player_list):
-        # 此方法在一条街结束后调用，处理底池的创建和更新
-        player_moves = [[player, player.action, player.current_bet]  # type: ignore
-                        for player in player_list 
-                        if player.action != Action.FOLD]
-        player_moves.sort(key=lambda x: x[2])  # 升序排列
-        # 我们知道，所有人下注量一定是相等的，除非有人all-in
-        # 只有all-in才可以下比别人都小的量
-        player_num = len(player_moves)
-        
-        for i, player_move in enumerate(player_moves):
-            # 遍历所有的操作
-            if player_move[1] != Action.ALL_IN:
-                # 现在下注的玩家的下注量不是all-in
-                # 则后续的一定不是all-in
-                # 要将后续的筹码都加入到新底池当中。
-                pot = Pot()
-                for p_move in player_moves[i:]:
-                    pot.add_player(p_move[0])
-                    pot.add_chips(p_move[2])
-                for p in player_list:
-                    if p.action == Action.FOLD:
-                        pot.add_chips(p.current_bet)
+        self.contributions: dict["Player", int] = {}  # 本手牌每位玩家投入的筹码总量
+        self.folded: set["Player"] = set()
+        self._total = 0
+
+    def add_bet(self, player: "Player", chips: int):
+        """ 记录玩家新投入的筹码 """
+        if chips:
+            self.contributions[player] = self.contributions.get(player, 0) + chips
+            self._total += chips
+
+    def fold(self, player: "Player"):
+        """ 弃牌玩家的筹码留在底池中, 但不再有资格赢取 """
+        self.folded.add(player)
 
-                self.pots.append(pot)
-                # print(player_moves)
-                break
-            else:
-                # 现在的玩家下注行动是all-in
-                # 从后面的玩家的下注量中拿出现在玩家的下注量，
-                # 形成新的底池，并将这个底池对象添加到PotManager的属性pots当中
-                all_in_amount = player_move[2]
-                # 计算超过all-in金额的总注
-                for p_move in player_moves[i:]:
-                    p_move[2] -= all_in_amount
-                side_pot_amount = all_in_amount * (player_num - i)  # 主底池金额 = all-in金额 x 参与人数
-                pot = Pot(side_pot_amount, set(p[0] for p in player_moves[i:]))
-                # 更新主底池金额
-                self.pots.append(pot)
-        return
-    
     def get_total_chips(self) -> int:
-        chips = sum(pot.amount for pot in self.pots)
-        return chips
+        return self._total
+
+    @property
+    def pots(self) -> list[Pot]:
+        """ 主池和各个边池, 按层级从低到高排列 """
+        live = self._live()
+        return [Pot(amount, set(live[first:])) for amount, first in self._layers(live)]
+
+    def settle(self, ranks: dict["Player", int], order: list["Player"]) -> dict["Player", int]:
+        """
+        一次结算所有底池
+        @args:
+            ranks: 摊牌玩家的牌力, 数字小的手牌大
+            order: 座位顺序, 不能平分的零头筹码按此顺序逐个分给胜者
+        @return:
+            每位摊牌玩家赢得的筹码 (包括退回的无人跟注的筹码)
+        """
+        payouts = dict.fromkeys(ranks, 0)
+        for result in self.resolve(ranks, order):
+            for player, chips in result.splits.items():
+                payouts[player] += chips
+        return payouts
+
+    def resolve(self, ranks: dict["Player", int], order: list["Player"]) -> list[PotResult]:
+        """
+        一次遍历得出每个底池的胜者和分配, O(p log p)
+        @args: 同 settle
+        @return:
+            主池和各个边池的结算结果, 按层级从低到高排列
+        """
+        live = sorted(ranks, key=lambda p: self.contributions.get(p, 0))
+        seat = {player: i for i, player in enumerate(order)}
+        results = []
+        best: typing.Optional[int] = None
+        winners: list["Player"] = []
+        i = len(live)
+        # 从最高层级往下走, 有资格的玩家只增不减, 胜者可以增量维护
+        for amount, first in reversed(self._layers(live)):
+            while i > first:
+                i -= 1
+                player = live[i]
+                rank = ranks[player]
+                if best is None or rank < best:
+                    best, winners = rank, [player]
+                elif rank == best:
+                    winners.append(player)
+            share, odd = divmod(amount, len(winners))
+            ordered = sorted(winners, key=lambda p: seat.get(p, len(seat)))
+            splits = {player: share + (1 if k < odd else 0) for k, player in enumerate(ordered)}
+            results.append(PotResult(amount, set(live[first:]), ordered, splits))
+        results.reverse()
+        return results
+
+    def _live(self) -> list["Player"]:
+        """ 未弃牌的玩家, 按投入升序 """
+        return sorted((p for p in self.contributions if p not in self.folded),
+                      key=self.contributions.__getitem__)
 
+    def _layers(self, live: list["Player"]) -> list[tuple[int, int]]:
+        """
+        live: 按投入升序的未弃牌玩家
+        @return:
+            [(底池金额, live中第一个有资格的玩家的下标)], 层级从低到高
+        """
+        if not live:
+            return [(self._total, 0)] if self._total else []
+        contributions = sorted(self.contributions.values())
+        layers = []
+        below = 0  # 已经计入的、低于当前层级的投入之和
+        j = 0
+        previous = 0  # 上一个层级以下 (含) 的筹码总量 sum(min(c, level))
+        level = None
+        for first, player in enumerate(live):
+            chips = self.contributions.get(player, 0)
+            if chips == level:
+                continue
+            level = chips
+            while j < len(contributions) and contributions[j] < level:
+                below += contributions[j]
+                j += 1
+            capped = below + level * (len(contributions) - j)
+            layers.append((capped - previous, first))
+            previous = capped
+        # 弃牌玩家超过最高层级的死钱并入最后一个底池
+        amount, first = layers[-1]
+        layers[-1] = (amount + self._total - previous, first)
+        return layers
 
     def reset_pot(self):
         # 重置彩池
-        self.pots = [Pot()]
+        self.contributions.clear()
+        self.folded.clear()
+        self._total = 0
@@ -0,0 +1,101 @@
+""" 机器人策略接口: 只读的牌局视图 GameState -> 玩家行动 Move """
+
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+import random
+from typing import NamedTuple, Optional
+
+from src.components import Action, Card, Move, Position, Street
+
+
+class GameState(NamedTuple):
+    """ 轮到某位玩家行动时的只读牌局视图 """
+    street: Street
+    hand: tuple[Card, ...]
+    board: tuple[Card, ...]
+    position: Position
+    money: int          # 剩余筹码
+    bet: int            # 本条街已经下注的总量
+    current_bet: int    # 本条街需要跟到的下注总量
+    min_raise: int      # 最小加注增量
+    pot: int            # 底池总量 (含本条街的下注)
+    players: int        # 未弃牌的玩家数
+    big_blind: int
+
+    @property
+    def to_call(self) -> int:
+        """ 跟注还需要下的注 """
+        return max(self.current_bet - self.bet, 0)
+
+
+class Strategy(ABC):
+    """ 机器人策略的基类, 子类实现 decide; 批量决策更快的策略 (如神经网络) 可以重写 decide_batch """
+
+    @abstractmethod
+    def decide(self, state: GameState) -> Move:
+        """ 为轮到行动的玩家决策 """
+
+    def decide_batch(self, states: list[GameState]) -> list[Move]:
+        """ 一次为多张牌桌的玩家决策, 返回的行动与 states 一一对应 """
+        return [self.decide(state) for state in states]
+
+    # ALL_IN 的下注量: 无论跟注还是加注, 超过筹码的下注量都会被视为all-in
+    ALL_IN_AMOUNT = 1 << 62
+
+    @staticmethod
+    def to_amount(move: Move, state: GameState) -> Optional[int]:
+        """ 把 Move 转换成 Player.bet 接受的下注量 """
+        if move.action == Action.FOLD:
+            return -1
+        if move.action == Action.CHECK:
+            # 本条街无人下注时 0 记为check; 否则 (如大盲的option) 只能是补齐0筹码的跟注, 0 会被视为fold
+            return 0 if state.current_bet == 0 else None
+        if move.action == Action.CALL:
+            return None
+        if move.action == Action.ALL_IN:
+            # 不足一次加注的all-in用 bet + money 表示会被视为跟注, 因此总是给一个超过筹码的量
+            return Strategy.ALL_IN_AMOUNT
+        # 加注: 加注后本条街的下注总量
+        return move.amount
+
+
+class RandomStrategy(Strategy):
+    """ 随机策略, 用于模拟和压力测试 """
+
+    def __init__(self, fold: float = 0.1, raise_: float = 0.1, seed: Optional[int] = None) -> None:
+        self._fold = fold
+        self._raise = raise_
+        self._rng = random.Random(seed)
+
+    def decide(self, state: GameState) -> Move:
+        x = self._rng.random()
+        if x < self._fold:
+            return Move(Action.FOLD)
+        if x < self._fold + self._raise:
+            amount = state.current_bet + state.min_raise + self._rng.randrange(state.big_blind * 5)
+            return Move(Action.RAISE, max(amount, state.big_blind))
+        return Move(Action.CALL)
+
+
+class ThreadedStrategy(Strategy):
+    """
+    在后台线程中运行的慢策略 (远程服务、外部引擎等)。
+    TableFarm 调用 submit_batch 后不会阻塞, 等待中的牌桌让出调度
+    """
+
+    def __init__(self, strategy: Strategy, workers: int = 1) -> None:
+        self.strategy = strategy
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    def decide(self, state: GameState) -> Move:
+        return self.strategy.decide(state)
+
+    def decide_batch(self, states: list[GameState]) -> list[Move]:
+        return self.strategy.decide_batch(states)
+
+    def submit_batch(self, states: list[GameState]) -> "Future[list[Move]]":
+        """ 在后台线程中批量决策 """
+        return self._executor.submit(self.strategy.decide_batch, states)
+
+    def close(self) -> None:
+        self._executor.shutdown()
@@ -0,0 +1,250 @@
+"""
+牌局历史的事件流: Dealer 把盲注、发牌、每个行动、底池和摊牌记录为紧凑的 Event,
+EventStream 攒批后交给后台线程写入各个 sink (环形缓冲、JSONL、二进制)
+"""
+
+from collections import deque
+from enum import IntEnum
+import json
+import queue
+import struct
+import threading
+from typing import BinaryIO, Iterable, Iterator, NamedTuple, Optional, TextIO, Union
+
+from src.components import Action, Card
+
+
+class EventType(IntEnum):
+    """ 事件类型 """
+    HAND = 0        # 新的一手牌, amount为大盲
+    SEAT = 1        # 玩家入座, amount为筹码, name为玩家名
+    BLIND = 2       # 盲注, amount为下注量
+    HOLE = 3        # 发手牌
+    BOARD = 4       # 发公共牌
+    MOVE = 5        # 玩家行动, amount为本条街的下注总量
+    POT = 6         # 一条街结束, amount为底池总量
+    SHOWDOWN = 7    # 摊牌, amount为牌力
+    PAYOUT = 8      # 分配筹码, amount为赢得的筹码
+
+
+class Event(NamedTuple):
+    """ 一条紧凑的事件记录 """
+    hand: int                   # 手牌编号
+    type: EventType
+    seat: int = -1              # Position.value, -1 表示整张牌桌
+    street: int = 0             # Street 的 order, 0 表示不属于某条街
+    action: int = -1            # ACTIONS 中的下标
+    amount: int = 0
+    cards: tuple[int, ...] = ()
+    name: str = ""
+    table: int = 0              # 牌桌编号, 多张牌桌共用一个事件流时区分各自的事件
+
+
+ACTIONS: tuple[Action, ...] = tuple(Action)
+ACTION_CODES: dict[Action, int] = {action: i for i, action in enumerate(ACTIONS)}
+
+# 二进制格式中用 0-51 的下标 (Card.index) 代替 32 位的 Card
+CARDS = Card.CARDS
+CARD_INDEX = Card.INT_TO_INDEX
+
+
+class EventSink:
+    """ 事件的去处, 子类实现 write """
+
+    def write(self, events: list[Event]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class RingBufferSink(EventSink):
+    """ 只在内存中保留最近 capacity 条事件 """
+
+    def __init__(self, capacity: int = 100_000) -> None:
+        self.events: deque[Event] = deque(maxlen=capacity)
+
+    def write(self, events: list[Event]) -> None:
+        self.events.extend(events)
+
+
+class JsonlSink(EventSink):
+    """ 每行一个JSON对象 """
+
+    def __init__(self, file: Union[str, TextIO]) -> None:
+        self._own = isinstance(file, str)
+        self._file: TextIO = open(file, "w", encoding="utf-8") if isinstance(file, str) else file
+
+    def write(self, events: list[Event]) -> None:
+        self._file.write("".join(json.dumps(JsonlSink.to_dict(event), ensure_ascii=False) + "\n"
+                                 for event in events))
+
+    def close(self) -> None:
+        self._file.flush()
+        if self._own:
+            self._file.close()
+
+    @staticmethod
+    def to_dict(event: Event) -> dict:
+        """ 省略默认值的字段, action 和 type 用名称表示 """
+        record = {"hand": event.hand, "type": event.type.name}
+        if event.seat >= 0:
+            record["seat"] = event.seat
+        if event.street:
+            record["street"] = event.street
+        if event.action >= 0:
+            record["action"] = ACTIONS[event.action].name
+        if event.amount:
+            record["amount"] = event.amount
+        if event.cards:
+            record["cards"] = list(event.cards)
+        if event.name:
+            record["name"] = event.name
+        if event.table:
+            record["table"] = event.table
+        return record
+
+    @staticmethod
+    def from_dict(record: dict) -> Event:
+        return Event(hand=record["hand"],
+                     type=EventType[record["type"]],
+                     seat=record.get("seat", -1),
+                     street=record.get("street", 0),
+                     action=ACTION_CODES[Action[record["action"]]] if "action" in record else -1,
+                     amount=record.get("amount", 0),
+                     cards=tuple(record.get("cards", ())),
+                     name=record.get("name", ""),
+                     table=record.get("table", 0))
+
+    @staticmethod
+    def read(path: str) -> Iterator[Event]:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                yield JsonlSink.from_dict(json.loads(line))
+
+
+class BinarySink(EventSink):
+    """
+    紧凑的二进制格式, 每条事件:
+        头部 <IIBbBbiBB: hand, table, type, seat, street, action, amount, 牌数, 名字字节数
+        之后是每张牌的下标 (1字节) 和 UTF-8 编码的名字
+    """
+    MAGIC = b"THEV"
+    HEADER = struct.Struct("<IIBbBbiBB")
+
+    def __init__(self, file: Union[str, BinaryIO]) -> None:
+        self._own = isinstance(file, str)
+        self._file: BinaryIO = open(file, "wb") if isinstance(file, str) else file
+        self._file.write(BinarySink.MAGIC)
+
+    def write(self, events: list[Event]) -> None:
+        pack = BinarySink.HEADER.pack
+        chunks = []
+        for event in events:
+            name = event.name.encode() if event.name else b""
+            chunks.append(pack(event.hand, event.table, event.type, event.seat, event.street,
+                               event.action, event.amount, len(event.cards), len(name)))
+            if event.cards:
+                chunks.append(bytes(CARD_INDEX[card] for card in event.cards))
+            if name:
+                chunks.append(name)
+        self._file.write(b"".join(chunks))
+
+    def close(self) -> None:
+        self._file.flush()
+        if self._own:
+            self._file.close()
+
+    @staticmethod
+    def read(path: str) -> Iterator[Event]:
+        with open(path, "rb") as file:
+            data = file.read()
+        if data[:4] != BinarySink.MAGIC:
+            raise ValueError(f"{path} is not a hand history file.")
+        header = BinarySink.HEADER
+        offset = 4
+        while offset < len(data):
+            hand, table, type_, seat, street, action, amount, n_cards, n_name = header.unpack_from(data, offset)
+            offset += header.size
+            cards = tuple(CARDS[i] for i in data[offset:offset + n_cards])
+            offset += n_cards
+            name = data[offset:offset + n_name].decode()
+            offset += n_name
+            yield Event(hand, EventType(type_), seat, street, action, amount, cards, name, table)
+
+
+class EventStream:
+    """
+    事件流: emit 只把事件追加到缓冲区, 攒够 batch_size 条后整批交给 sink。
+    background=True 时由后台线程写入, 模拟器的主循环不等待序列化和磁盘
+    """
+
+    def __init__(self,
+                 sinks: Iterable[EventSink],
+                 batch_size: int = 4096,
+                 background: bool = True) -> None:
+        self.sinks = list(sinks)
+        self.batch_size = batch_size
+        self._buffer: list[Event] = []
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None  # 后台写入时 sink 抛出的异常, 之后的 flush 都会抛出
+        if background:
+            # 有界队列: 写入跟不上时主循环才会等待, 避免内存无限增长
+            self._queue = queue.Queue(maxsize=64)
+            self._thread = threading.Thread(target=self._worker, name="event-stream", daemon=True)
+            self._thread.start()
+
+    def __enter__(self) -> "EventStream":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def emit(self, event: Event) -> None:
+        buffer = self._buffer
+        buffer.append(event)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """ 把缓冲区的事件交给 sink (后台模式下只是入队), 后台写入失败时在这里抛出异常 """
+        self._raise_error()
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        if self._queue is not None:
+            self._queue.put(batch)
+        else:
+            self._write(batch)
+
+    def close(self) -> None:
+        """ 写完所有事件并关闭 sink """
+        try:
+            self.flush()
+        finally:
+            if self._thread is not None:
+                self._queue.put(None)  # type: ignore
+                self._thread.join()
+                self._thread = None
+            for sink in self.sinks:
+                sink.close()
+        self._raise_error()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _write(self, batch: list[Event]) -> None:
+        for sink in self.sinks:
+            sink.write(batch)
+
+    def _worker(self) -> None:
+        while (batch := self._queue.get()) is not None:  # type: ignore
+            if self._error is not None:
+                # 已经失败: 继续取出并丢弃, 主循环不会因为队列满而永远阻塞
+                continue
+            try:
+                self._write(batch)
+            except BaseException as error:
+                self._error = error
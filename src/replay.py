@@ -0,0 +1,118 @@
+"""
+确定性回放: 牌桌的随机种子 + 依次传给 Player.bet 的下注量, 足以在无界面模式下完整重现牌局。
+可用于从线上日志二分定位问题, 或在修改牌力计算、底池逻辑之后重新结算历史牌局
+"""
+
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from src.components import Action
+from src.dealer import Dealer
+from src.gamer import Player, Strategy
+from src.history import ACTIONS, Event, EventStream, EventType
+
+
+class ReplayError(ValueError):
+    """ 记录的下注量与重放的牌局对不上 """
+
+
+class TableLog(NamedTuple):
+    """ 重现一张牌桌所需的全部信息 """
+    seed: int
+    seats: tuple[tuple[str, int], ...]      # 打乱前的入座顺序和筹码
+    big_blind: int
+    small_blind: int
+    actions: list[Optional[int]]           # 依次传给 Player.bet 的下注量
+    table: int = 0                          # 牌桌编号
+
+
+class Recorder:
+    """ 包装决策函数, 记下每一次返回的下注量 """
+
+    def __init__(self, decide: Callable[[Player], Optional[int]]) -> None:
+        self.decide = decide
+        self.actions: list[Optional[int]] = []
+
+    def __call__(self, player: Player) -> Optional[int]:
+        amount = self.decide(player)
+        self.actions.append(amount)
+        return amount
+
+
+class Replay:
+    """ 回放引擎 """
+    ALL_IN_AMOUNT = Strategy.ALL_IN_AMOUNT
+    _MISSING = object()
+
+    @staticmethod
+    def record(dealer: Dealer, hands: Optional[int] = None) -> TableLog:
+        """ 用牌桌自己的决策方式进行hands手牌, 同时记录回放所需的信息 """
+        recorder = Recorder(dealer.decide)
+        Dealer.drive(dealer.session_steps(hands), recorder)
+        return Replay.table_log(dealer, recorder.actions)
+
+    @staticmethod
+    def table_log(dealer: Dealer, actions: list[Optional[int]]) -> TableLog:
+        return TableLog(dealer.seed, dealer.initial_seats, dealer.big_blind, dealer.small_blind, actions,
+                        dealer.table)
+
+    @staticmethod
+    def dealer(log: TableLog, events: Optional[EventStream] = None) -> Dealer:
+        """ 按记录重建牌桌, 玩家都是不带策略的普通玩家 """
+        players = [Player(name, money) for name, money in log.seats]
+        return Dealer(players, big_blind=log.big_blind, small_blind=log.small_blind,
+                      headless=True, events=events, seed=log.seed, table=log.table)
+
+    @staticmethod
+    def run(log: TableLog,
+            hands: Optional[int] = None,
+            events: Optional[EventStream] = None,
+            strict: bool = True) -> Dealer:
+        """
+        以无界面模式全速重放, 返回重放结束时的牌桌 (可以读取玩家筹码等结果)
+        @args:
+            hands: 重放的手数, 默认直到记录的下注量用完或只剩一位玩家
+            strict: 为True时要求记录的下注量恰好用完
+        """
+        dealer = Replay.dealer(log, events)
+        actions = iter(log.actions)
+        used = 0
+
+        def decide(player: Player) -> Optional[int]:
+            nonlocal used
+            amount = next(actions, Replay._MISSING)
+            if amount is Replay._MISSING:
+                raise ReplayError(f"Recorded actions ran out at decision {used + 1} ({player.name}).")
+            used += 1
+            return amount  # type: ignore
+
+        try:
+            Dealer.drive(dealer.session_steps(hands), decide)
+        except ReplayError:
+            if strict or hands is not None:
+                raise
+        if strict and hands is None and used != len(log.actions):
+            raise ReplayError(f"Replay finished after {used} of {len(log.actions)} recorded actions.")
+        return dealer
+
+    @staticmethod
+    def actions_from_events(events: Iterable[Event]) -> list[Optional[int]]:
+        """
+        从事件流的 MOVE 事件还原下注量。
+        fold -> -1, check -> 0, call -> None, raise -> 加注后的下注总量, all-in -> 足够大的数
+        """
+        actions: list[Optional[int]] = []
+        for event in events:
+            if event.type != EventType.MOVE:
+                continue
+            action = ACTIONS[event.action]
+            if action == Action.FOLD:
+                actions.append(-1)
+            elif action == Action.CHECK:
+                actions.append(0)
+            elif action == Action.CALL:
+                actions.append(None)
+            elif action == Action.RAISE:
+                actions.append(event.amount)
+            else:
+                actions.append(Replay.ALL_IN_AMOUNT)
+        return actions
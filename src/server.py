@@ -0,0 +1,260 @@
+"""
+asyncio 牌桌服务: 一个事件循环承载上百张牌桌, 远程玩家通过本地socket行动
+
+协议: 每行一个JSON消息
+    客户端 -> 服务端  {"type": "join", "table": 牌桌名, "name": 座位名}
+    服务端 -> 客户端  {"type": "act", "seq": 序号, "state": GameState}
+    客户端 -> 服务端  {"type": "move", "seq": 序号, "action": "Raise", "amount": 60}
+    服务端 -> 客户端  {"type": "end", "money": 剩余筹码}
+    服务端 -> 客户端  {"type": "error", "message": 错误信息}
+超时、断线或格式错误的行动视为check/fold
+"""
+
+import asyncio
+import json
+from typing import Optional
+
+from src.components import Action, Card, Move, Position, Street
+from src.dealer import Dealer
+from src.gamer import BotPlayer, GameState, Player, RemotePlayer, Strategy
+
+
+class TableProtocol:
+    """ 消息的编码与解码 """
+
+    @staticmethod
+    def encode_state(state: GameState) -> dict:
+        message = state._asdict()
+        message["street"] = state.street.name
+        message["position"] = state.position.name
+        message["hand"] = [int(card) for card in state.hand]
+        message["board"] = [int(card) for card in state.board]
+        return message
+
+    @staticmethod
+    def decode_state(message: dict) -> GameState:
+        return GameState(**{**message,
+                            "street": Street[message["street"]],
+                            "position": Position[message["position"]],
+                            "hand": tuple(Card.from_int(card) for card in message["hand"]),
+                            "board": tuple(Card.from_int(card) for card in message["board"])})
+
+    @staticmethod
+    def encode_move(move: Move) -> dict:
+        return {"action": move.action.to_string(), "amount": move.amount}
+
+    @staticmethod
+    def decode_move(message: dict) -> Move:
+        """ 格式错误时抛出 KeyError/ValueError/TypeError """
+        return Move(Action.from_string(message["action"]), int(message.get("amount", 0)))
+
+
+class Connection:
+    """ 一个客户端的socket连接, 每行一个JSON消息 """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, message: dict) -> None:
+        self.writer.write(json.dumps(message).encode() + b"\n")
+        await self.writer.drain()
+
+    async def receive(self) -> dict:
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by peer.")
+        return json.loads(line)
+
+    async def close(self) -> None:
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+class ServerTable:
+    """ 服务中的一张牌桌 """
+
+    def __init__(self, name: str, dealer: Dealer, hands: Optional[int] = None) -> None:
+        self.name = name
+        self.dealer = dealer
+        self.hands = hands
+        self.played = 0
+        self.seats = {str(player): player for player in dealer.player_queue
+                      if isinstance(player, RemotePlayer)}
+        self.connections: dict[Player, Connection] = {}
+        self.seated = asyncio.Event()
+        self.finished = asyncio.Event()
+        if not self.seats:
+            self.seated.set()
+        self.seq = 0
+
+
+class TableServer:
+    """ 牌桌服务端 """
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 action_timeout: float = 30.,
+                 join_timeout: float = 60.) -> None:
+        """
+        @args:
+            port: 0 表示由系统分配, start() 返回实际端口
+            action_timeout: 每次行动的超时秒数, 超时视为check/fold
+            join_timeout: 牌桌开始前等待远程玩家入座的秒数, 届时未入座的座位与超时一样一律check/fold
+        """
+        self.host = host
+        self.port = port
+        self.action_timeout = action_timeout
+        self.join_timeout = join_timeout
+        self.tables: dict[str, ServerTable] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def add_table(self, name: str, dealer: Dealer, hands: Optional[int] = None) -> ServerTable:
+        """ 添加牌桌, 牌桌的 RemotePlayer 全部入座 (或等待超时) 后开始 """
+        if name in self.tables:
+            raise ValueError(f"Table {name!r} already exists.")
+        if dealer.strategy is None:
+            # 普通 Player 会由 get_player_bet 调用 input(), 阻塞整个事件循环
+            for player in dealer.player_queue:
+                if not isinstance(player, (BotPlayer, RemotePlayer)):
+                    raise ValueError(f"Seat {player.name!r} is neither a BotPlayer nor a RemotePlayer, "
+                                     f"and the dealer has no strategy for it.")
+        dealer.headless = True
+        table = self.tables[name] = ServerTable(name, dealer, hands)
+        return table
+
+    async def start(self) -> int:
+        """ 开始监听, 返回端口 """
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def serve(self) -> dict[str, int]:
+        """ 运行所有牌桌直到结束, 返回每张牌桌进行的手数 """
+        if self._server is None:
+            await self.start()
+        try:
+            await asyncio.gather(*(self._run_table(table) for table in self.tables.values()))
+        finally:
+            self._server.close()  # type: ignore
+            await self._server.wait_closed()  # type: ignore
+        return {name: table.played for name, table in self.tables.items()}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """ 处理入座请求; 入座后连接交给牌桌的协程读写 """
+        connection = Connection(reader, writer)
+        try:
+            message = await asyncio.wait_for(connection.receive(), self.action_timeout)
+            table = self.tables[message["table"]]
+            player = table.seats[message["name"]]
+        except (asyncio.TimeoutError, ConnectionError, ValueError, KeyError, TypeError) as error:
+            await self._reject(connection, f"Bad join request: {error!r}")
+            return
+        if player in table.connections:
+            await self._reject(connection, f"Seat {message['name']!r} is taken.")
+            return
+        table.connections[player] = connection
+        if len(table.connections) == len(table.seats):
+            table.seated.set()
+        # 保持回调存活直到牌桌结束, 连接由牌桌的协程关闭
+        await table.finished.wait()
+
+    @staticmethod
+    async def _reject(connection: Connection, reason: str) -> None:
+        try:
+            await connection.send({"type": "error", "message": reason})
+        except ConnectionError:
+            pass
+        await connection.close()
+
+    async def _run_table(self, table: ServerTable) -> None:
+        """ 牌桌的协程: 机器人同步决策, 远程玩家的行动异步等待 """
+        dealer = table.dealer
+        try:
+            async with asyncio.timeout(self.join_timeout):
+                await table.seated.wait()
+        except TimeoutError:
+            # 没有连接的座位在 _ask 中视为超时
+            pass
+        while len(dealer.player_queue) > 1 and (table.hands is None or table.played < table.hands):
+            steps = dealer.hand_steps()
+            amount = None
+            try:
+                while True:
+                    player = steps.send(amount)
+                    if isinstance(player, RemotePlayer):
+                        amount = await self._ask(table, player)
+                    else:
+                        amount = dealer.decide(player)
+            except StopIteration:
+                pass
+            table.played += 1
+            await asyncio.sleep(0)  # 每手牌结束后让出事件循环
+        table.finished.set()
+        for player, connection in table.connections.items():
+            try:
+                await connection.send({"type": "end", "money": player.money})
+            except ConnectionError:
+                pass
+            await connection.close()
+
+    async def _ask(self, table: ServerTable, player: RemotePlayer) -> Optional[int]:
+        """ 请求远程玩家行动, 超时、断线或格式错误时能check就check, 否则fold """
+        state = table.dealer.game_state(player)
+        default = Strategy.to_amount(Move(Action.CHECK), state) if state.to_call == 0 else -1
+        connection = table.connections.get(player)
+        if connection is None:
+            return default
+        table.seq += 1
+        seq = table.seq
+        try:
+            await connection.send({"type": "act", "seq": seq, "state": TableProtocol.encode_state(state)})
+            async with asyncio.timeout(self.action_timeout):
+                while True:
+                    message = await connection.receive()
+                    # 丢弃超时后才到达的旧回复
+                    if message.get("type") == "move" and message.get("seq") == seq:
+                        return Strategy.to_amount(TableProtocol.decode_move(message), state)
+        except TimeoutError:
+            return default
+        except (ConnectionError, ValueError, KeyError, TypeError):
+            # 断线或协议错误: 之后该座位一律check/fold
+            del table.connections[player]
+            await connection.close()
+            return default
+
+
+class LocalClient:
+    """ 本地替身客户端: 用一个 Strategy 代替人类玩家连接服务端, 用于测试 """
+
+    def __init__(self, table: str, name: str, strategy: Strategy,
+                 host: str = "127.0.0.1", port: int = 0) -> None:
+        self.table = table
+        self.name = name
+        self.strategy = strategy
+        self.host = host
+        self.port = port
+        self.moves = 0
+
+    async def play(self) -> dict:
+        """ 入座并行动直到牌桌结束, 返回最后一条消息 (end 或 error) """
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        connection = Connection(reader, writer)
+        try:
+            await connection.send({"type": "join", "table": self.table, "name": self.name})
+            while True:
+                message = await connection.receive()
+                if message["type"] != "act":
+                    return message
+                move = self.strategy.decide(TableProtocol.decode_state(message["state"]))
+                self.moves += 1
+                await connection.send({"type": "move", "seq": message["seq"],
+                                       **TableProtocol.encode_move(move)})
+        except ConnectionError:
+            return {"type": "error", "message": "Connection closed by server."}
+        finally:
+            await connection.close()
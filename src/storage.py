@@ -0,0 +1,330 @@
+"""
+列式牌局历史: 分块、只追加的定长列文件, 以及内存映射的读取和查询 (查询需要numpy)
+
+每个分块文件 chunk-XXXXXX.thc:
+    头部 <4sIII: magic, 版本, 行数, 名字表的字节数
+    列 (按行数连续存放, 4字节的列在前以保持对齐):
+        hand    uint32      手牌编号
+        amount  int32
+        table   uint32      牌桌编号 (Event.table)
+        cards   uint32 x 5  Card int, 0 表示空位
+        type    uint8       EventType
+        seat    int8        Position.value, -1 表示整张牌桌
+        street  uint8       Street 的 order
+        action  int8        ACTIONS 中的下标, -1 表示无
+    名字表: JSON {行号: 名字}, 只有 SEAT 事件有名字
+一个分块只包含完整的手牌, 一手牌的行是连续的, 因此按手牌的查询可以逐块独立进行。
+多张牌桌共用一个事件流时, sink 按牌桌缓存进行中的手牌, 一手牌结束后才整体写入。
+hand 列是整个目录内连续递增的编号, 在分块写入时才分配: 分块文件名用硬链接独占地认领,
+认领失败 (其他 sink 或进程抢先写入了同名分块) 时基于新的最后一个分块重新编号, 不会覆盖或重复。
+不支持硬链接的文件系统 (FAT、部分网络盘) 上先用 O_EXCL 创建空文件认领文件名, 再用写好的临时文件替换它;
+空的分块文件表示正在写入, 读者跳过它, 其他写入者等它写完再编号
+"""
+
+from array import array
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Iterator, NamedTuple, Optional
+
+from src.components import Action, Position, Street
+from src.history import ACTION_CODES, Event, EventSink, EventType
+
+
+class ColumnarSink(EventSink):
+    """ 把事件写成列式分块文件, 可以和其他 sink 一起挂在 EventStream 上 """
+    MAGIC = b"THHC"
+    VERSION = 1
+    HEADER = struct.Struct("<4sIII")
+    CARDS_PER_ROW = 5
+    # (列名, array类型码), 与文件中的顺序一致
+    COLUMNS = (("hand", "I"), ("amount", "i"), ("table", "I"), ("cards", "I"),
+               ("type", "B"), ("seat", "b"), ("street", "B"), ("action", "b"))
+
+    # 等待其他写入者写完已认领的空分块的最长秒数
+    CLAIM_TIMEOUT = 10.
+
+    def __init__(self, directory: str, chunk_rows: int = 1 << 20) -> None:
+        """
+        @args:
+            chunk_rows: 分块的目标行数, 分块只在完整的手牌之间切换
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self._open: dict[int, list[Event]] = {}     # 牌桌 -> 进行中的一手牌的事件
+        self._last_hand: dict[int, int] = {}        # 牌桌 -> 最近一手牌在事件流中的编号
+        self._reset()
+
+    @staticmethod
+    def last_hand(path: str) -> Optional[int]:
+        """ 分块中最后一手牌的编号, 分块已被认领但还没有写完时返回 None """
+        with open(path, "rb") as file:
+            header = file.read(ColumnarSink.HEADER.size)
+            if not header:
+                return None
+            _, _, rows, _ = ColumnarSink.HEADER.unpack(header)
+            if not rows:
+                return 0
+            file.seek(ColumnarSink.HEADER.size + (rows - 1) * 4)
+            return struct.unpack("<I", file.read(4))[0]
+
+    def _reset(self) -> None:
+        self._columns = {name: array(code) for name, code in ColumnarSink.COLUMNS}
+        self._names: dict[int, str] = {}
+        self._rows = 0
+        self._hands = 0     # 缓冲区中的手数, hand 列暂存 1 起的序号, 写入时加上目录中的最后编号
+
+    def write(self, events: list[Event]) -> None:
+        open_hands, last_hand = self._open, self._last_hand
+        for event in events:
+            table = event.table
+            if event.type == EventType.HAND:
+                if event.hand <= last_hand.get(table, 0):
+                    raise ValueError(f"Hand {event.hand} of table {table} is not newer than hand "
+                                     f"{last_hand[table]}: several writers share this table id.")
+                if table in open_hands:
+                    self._append(open_hands.pop(table))
+                last_hand[table] = event.hand
+                open_hands[table] = [event]
+            elif table in open_hands and open_hands[table][0].hand == event.hand:
+                open_hands[table].append(event)
+            else:
+                raise ValueError(f"Event of hand {event.hand} of table {table} arrived outside of its hand.")
+
+    def _append(self, events: list[Event]) -> None:
+        """ 把一手完整的牌写入缓冲区 """
+        if self._rows >= self.chunk_rows:
+            self.flush_chunk()
+        columns = self._columns
+        hand, amount, table, cards = columns["hand"], columns["amount"], columns["table"], columns["cards"]
+        type_, seat, street, action = columns["type"], columns["seat"], columns["street"], columns["action"]
+        padding = (0,) * ColumnarSink.CARDS_PER_ROW
+        self._hands += 1
+        for event in events:
+            hand.append(self._hands)
+            amount.append(event.amount)
+            table.append(event.table)
+            cards.extend((event.cards + padding)[:ColumnarSink.CARDS_PER_ROW])
+            type_.append(event.type)
+            seat.append(event.seat)
+            street.append(event.street)
+            action.append(event.action)
+            if event.name:
+                self._names[self._rows] = event.name
+            self._rows += 1
+
+    def flush_chunk(self) -> None:
+        """
+        把缓冲的行写成一个新的分块文件。先写临时文件, 再硬链接到分块文件名:
+        读者不会看到写了一半的分块, 链接在目标已存在时失败, 不会覆盖其他 sink 的分块
+        """
+        if not self._rows:
+            return
+        names = json.dumps(self._names, ensure_ascii=False).encode()
+        tmp = os.path.join(self.directory, f".chunk-{os.getpid()}-{id(self):x}.tmp")
+        deadline = time.monotonic() + ColumnarSink.CLAIM_TIMEOUT
+        try:
+            while True:
+                existing = HandStore.chunk_paths(self.directory)
+                number = int(os.path.basename(existing[-1])[6:12]) + 1 if existing else 0
+                first = ColumnarSink.last_hand(existing[-1]) if existing else 0
+                if first is None:
+                    # 其他写入者认领了最后一个分块但还没有写完
+                    if time.monotonic() > deadline:
+                        raise OSError(f"{existing[-1]} is still empty, remove it if its writer crashed.")
+                    time.sleep(0.01)
+                    continue
+                with open(tmp, "wb") as file:
+                    file.write(ColumnarSink.HEADER.pack(ColumnarSink.MAGIC, ColumnarSink.VERSION,
+                                                        self._rows, len(names)))
+                    array("I", (hand + first for hand in self._columns["hand"])).tofile(file)
+                    for name, _ in ColumnarSink.COLUMNS[1:]:
+                        self._columns[name].tofile(file)
+                    file.write(names)
+                path = os.path.join(self.directory, f"chunk-{number:06d}.thc")
+                try:
+                    os.link(tmp, path)
+                    break
+                except FileExistsError:
+                    continue
+                except OSError:
+                    # 不支持硬链接: 用空文件认领文件名, 再原子地替换为写好的分块
+                    try:
+                        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                    except FileExistsError:
+                        continue
+                    os.replace(tmp, path)
+                    break
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self._reset()
+
+    def close(self) -> None:
+        """ 写入所有牌桌进行中的手牌和缓冲的行 """
+        for table in sorted(self._open):
+            self._append(self._open[table])
+        self._open.clear()
+        self.flush_chunk()
+
+
+class EventPattern(NamedTuple):
+    """
+    手牌查询的条件: 手牌中至少有 min_count 条事件的各字段与给定值相同 (None 表示不限)
+    例如 EventPattern(EventType.MOVE, Position.BTN, Street.PRE_FLOP, Action.RAISE)
+    """
+    type: Optional[EventType] = None
+    seat: Optional[Position] = None
+    street: Optional[Street] = None
+    action: Optional[Action] = None
+    min_count: int = 1
+    table: Optional[int] = None
+
+    def codes(self) -> dict[str, int]:
+        """ 列名 -> 需要相等的存储值 """
+        codes = {}
+        if self.type is not None:
+            codes["type"] = int(self.type)
+        if self.seat is not None:
+            codes["seat"] = self.seat.value
+        if self.street is not None:
+            codes["street"] = self.street.value.order
+        if self.action is not None:
+            codes["action"] = ACTION_CODES[self.action]
+        if self.table is not None:
+            codes["table"] = self.table
+        return codes
+
+
+class Chunk:
+    """ 内存映射的一个分块, 各列都是不复制的 numpy 视图 """
+
+    def __init__(self, path: str) -> None:
+        import numpy as np
+
+        self.path = path
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, rows, names_size = ColumnarSink.HEADER.unpack_from(self._mmap)
+        if magic != ColumnarSink.MAGIC or version != ColumnarSink.VERSION:
+            raise ValueError(f"{path} is not a version {ColumnarSink.VERSION} hand history chunk.")
+        self.rows = rows
+        self.columns = {}
+        offset = ColumnarSink.HEADER.size
+        for name, code in ColumnarSink.COLUMNS:
+            dtype = np.dtype(code)
+            count = rows * ColumnarSink.CARDS_PER_ROW if name == "cards" else rows
+            column = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+            self.columns[name] = column.reshape(rows, -1) if name == "cards" else column
+            offset += dtype.itemsize * count
+        self._names_offset, self._names_size = offset, names_size
+        self._names: Optional[dict[int, str]] = None
+
+    def close(self) -> None:
+        """ 关闭内存映射; 仍被引用的列数组会使关闭失败 (BufferError) """
+        self.columns = {}
+        self._mmap.close()
+
+    def name(self, row: int) -> str:
+        if self._names is None:
+            blob = self._mmap[self._names_offset:self._names_offset + self._names_size]
+            self._names = {int(row): name for row, name in json.loads(blob).items()}
+        return self._names.get(row, "")
+
+    def match(self, pattern: EventPattern):
+        """ 满足条件的手牌编号 (升序) """
+        import numpy as np
+
+        mask = np.ones(self.rows, dtype=bool)
+        for name, value in pattern.codes().items():
+            mask &= self.columns[name] == value
+        hands = self.columns["hand"][mask]
+        if pattern.min_count <= 1:
+            return np.unique(hands)
+        hands, counts = np.unique(hands, return_counts=True)
+        return hands[counts >= pattern.min_count]
+
+    def event(self, row: int) -> Event:
+        columns = self.columns
+        return Event(hand=int(columns["hand"][row]),
+                     type=EventType(int(columns["type"][row])),
+                     seat=int(columns["seat"][row]),
+                     street=int(columns["street"][row]),
+                     action=int(columns["action"][row]),
+                     amount=int(columns["amount"][row]),
+                     cards=tuple(int(card) for card in columns["cards"][row] if card),
+                     name=self.name(row),
+                     table=int(columns["table"][row]))
+
+
+class HandStore:
+    """ 一个目录中的所有分块, 只在查询条件涉及的列上做向量化比较, 不解码整行 """
+
+    def __init__(self, directory: str) -> None:
+        # 空的分块还在写入中, 跳过
+        self.chunks = [Chunk(path) for path in HandStore.chunk_paths(directory) if os.path.getsize(path)]
+
+    def __enter__(self) -> "HandStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """ 关闭所有分块的内存映射, 之后目录中的文件才能在 Windows 上被删除或轮换 """
+        for chunk in self.chunks:
+            chunk.close()
+        self.chunks = []
+
+    @staticmethod
+    def chunk_paths(directory: str) -> list[str]:
+        return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                      if name.startswith("chunk-") and name.endswith(".thc"))
+
+    def __len__(self) -> int:
+        """ 事件总行数 """
+        return sum(chunk.rows for chunk in self.chunks)
+
+    def select(self, *patterns: EventPattern) -> list[int]:
+        """
+        同时满足所有条件的手牌编号。例如BTN翻前加注并且摊牌的手牌:
+            store.select(EventPattern(EventType.MOVE, Position.BTN, Street.PRE_FLOP, Action.RAISE),
+                         EventPattern(EventType.SHOWDOWN, Position.BTN),
+                         EventPattern(EventType.SHOWDOWN, min_count=2))
+        """
+        import numpy as np
+
+        selected = []
+        for chunk in self.chunks:
+            hands = None
+            for pattern in patterns:
+                matched = chunk.match(pattern)
+                hands = matched if hands is None else np.intersect1d(hands, matched, assume_unique=True)
+                if not len(hands):
+                    break
+            if hands is None:
+                hands = np.unique(chunk.columns["hand"])
+            selected.extend(hands.tolist())
+        return selected
+
+    def events(self, hand: int) -> list[Event]:
+        """ 解码一手牌的全部事件, 用于回放 """
+        return next(self.iter_hands([hand]), [])
+
+    def iter_hands(self, hands: list[int]) -> Iterator[list[Event]]:
+        """ 按编号顺序解码给定手牌的事件 """
+        import numpy as np
+
+        wanted = np.asarray(sorted(set(hands)), dtype=np.uint32)
+        for chunk in self.chunks:
+            column = chunk.columns["hand"]
+            rows = np.flatnonzero(np.isin(column, wanted))
+            if not len(rows):
+                continue
+            # 行号按手牌连续, 在手牌编号变化处切开
+            boundaries = np.flatnonzero(np.diff(column[rows])) + 1
+            for group in np.split(rows, boundaries):
+                yield [chunk.event(int(row)) for row in group]
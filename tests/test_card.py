@@ -0,0 +1,38 @@
+""" 52张规范牌的常量表和稠密下标 """
+import pickle
+
+import pytest
+
+from src.components import Card
+
+
+def test_dense_index_round_trip():
+    assert len(Card.CARDS) == 52 == len(set(Card.CARDS))
+    for index, card in enumerate(Card.CARDS):
+        assert Card.INT_TO_INDEX[card] == card.index == Card.int_to_index(int(card)) == index
+        assert Card.from_index(index) is card
+        assert index == card.rank * 4 + Card.INDEX_SUITS.index(Card.PRETTY_SUITS[card.suit])
+    assert Card.CARDS[0] == Card("♥", "2") and Card.CARDS[51] == Card("♠", "A")
+
+
+def test_constructors_return_the_canonical_instances():
+    for card in Card.CARDS:
+        assert Card.from_int(int(card)) is card
+        assert Card(Card.PRETTY_SUITS[card.suit], Card.STR_RANKS[card.rank]) is card
+        assert Card.STR_TO_CARD[str(card)] is card
+        assert Card.STR_TO_CARD[Card.STR_RANKS[card.rank] + Card.INT_SUIT_TO_CHAR_SUIT[card.suit]] is card
+        assert pickle.loads(pickle.dumps(card)) is card
+
+
+def test_swapped_or_ascii_arguments_are_rejected():
+    with pytest.raises(KeyError):
+        Card("A", "s")
+    with pytest.raises(KeyError):
+        Card("s", "A")
+
+
+def test_masks():
+    cards = [Card.STR_TO_CARD[text] for text in ("2h", "As", "Td")]
+    mask = Card.cards_to_mask(cards)
+    assert bin(mask).count("1") == 3
+    assert Card.mask_to_cards(mask) == sorted(cards, key=lambda card: card.index)
@@ -0,0 +1,43 @@
+""" 位掩码牌堆的发牌、死牌与重置 """
+import random
+
+import pytest
+
+from src.components import Card, Deck
+
+
+def test_deals_every_card_once():
+    deck = Deck(random.Random(0))
+    dealt = deck.draw(52)
+    assert sorted(dealt) == sorted(Card.CARDS)
+    assert len(deck) == 0 and deck.mask == 0
+    with pytest.raises(IndexError):
+        deck.pop()
+
+
+def test_dead_cards_are_never_dealt_and_survive_reset():
+    dead = [Card.STR_TO_CARD[text] for text in ("As", "Kh", "2c")]
+    deck = Deck(random.Random(1), dead=dead)
+    assert len(deck) == 49 and not any(card in deck for card in dead)
+    for _ in range(20):
+        deck.reset()
+        dealt = deck.draw(10)
+        assert not set(dealt) & set(dead)
+        assert deck.mask == Card.cards_to_mask(deck.remaining())
+        assert all(card not in deck for card in dealt)
+    # 已经发出的牌也可以变成死牌
+    deck.reset()
+    card = deck.pop()
+    deck.remove(card)
+    deck.reset()
+    assert len(deck) == 48 and card not in deck
+    deck.reset(dead=[])
+    assert len(deck) == 52 and deck.mask == Deck.FULL_MASK
+
+
+def test_same_rng_deals_the_same_cards():
+    first, second = Deck(random.Random(7)), Deck(random.Random(7))
+    for _ in range(5):
+        assert first.draw(9) == second.draw(9)
+        first.reset()
+        second.reset()
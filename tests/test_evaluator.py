@@ -0,0 +1,95 @@
+""" Evaluator 的单次求值与逐个检查 21 种 5 张牌组合的结果对比 """
+import itertools
+import random
+
+import pytest
+
+from src.components import Card, Evaluator, LOOKUP_TABLE
+
+
+def scan(cards):
+    return min(Evaluator._five(combo) for combo in itertools.combinations(cards, 5))
+
+
+@pytest.mark.parametrize("size", [5, 6, 7])
+def test_seven_matches_combination_scan(size):
+    rng = random.Random(size)
+    for _ in range(3000):
+        cards = rng.sample(Card.CARDS, size)
+        assert Evaluator._seven(cards) == scan(cards)
+
+
+def test_calculate_returns_a_combo_of_that_rank():
+    rng = random.Random(1)
+    for _ in range(3000):
+        cards = rng.sample(Card.CARDS, 7)
+        hand_rank, combo = Evaluator.calculate(cards[:2], cards[2:])
+        assert hand_rank == scan(cards)
+        assert len(set(combo)) == 5 and set(combo) <= set(cards)
+        assert Evaluator._five(combo) == hand_rank
+        assert [(card >> 8) & 0xF for card in combo] == list(Evaluator.decode(hand_rank))
+
+
+@pytest.mark.parametrize("size", [5, 6, 7])
+def test_evaluate_batch_matches_seven(size):
+    np = pytest.importorskip("numpy")
+    rng = random.Random(10 + size)
+    rows = [rng.sample(Card.CARDS, size) for _ in range(5000)]
+    # 让同花在样本中足够常见
+    rows += [rng.sample([card for card in Card.CARDS if card.suit == suit], 5) + rng.sample(Card.CARDS, size - 5)
+             for suit in (1, 2, 4, 8) for _ in range(200)]
+    rows = [row for row in rows if len(set(row)) == size]
+    cards = np.array(rows, dtype=np.int64)
+    ranks = Evaluator.evaluate_batch(cards[:, :2], cards[:, 2:])
+    assert ranks.tolist() == [Evaluator._seven(row) for row in rows]
+
+
+def test_evaluate_batch_rejects_wrong_sizes():
+    np = pytest.importorskip("numpy")
+    with pytest.raises(ValueError):
+        Evaluator.evaluate_batch(np.zeros((1, 2), dtype=np.int64), np.zeros((1, 2), dtype=np.int64))
+
+
+def test_rank_hands_shares_the_board():
+    rng = random.Random(2)
+    for board_size in (3, 4, 5):
+        for _ in range(500):
+            cards = rng.sample(Card.CARDS, board_size + 2 * 9)
+            board = cards[:board_size]
+            hands = [cards[board_size + 2 * i:board_size + 2 + 2 * i] for i in range(9)]
+            assert Evaluator.rank_hands(hands, board) == [scan(hand + board) for hand in hands]
+
+
+def test_describe_includes_kickers():
+    cards = [Card.STR_TO_CARD[text] for text in ("Kh", "Kd", "As", "Qc", "9d", "4h", "2c")]
+    hand_rank = Evaluator._seven(cards)
+    assert Evaluator.describe(hand_rank) == "Pair of Kings, A-Q-9 kickers"
+    assert Evaluator.describe(1) == "Royal Flush"
+    assert Evaluator.describe(1609) == "Straight, Five high"
+
+
+def test_rank_class_table_matches_the_class_bounds():
+    bounds = sorted(LOOKUP_TABLE.MAX_TO_RANK_CLASS.items())
+    assert len(LOOKUP_TABLE.RANK_TO_CLASS) == LOOKUP_TABLE.MAX_HIGH_CARD + 1
+    for hand_rank in range(1, LOOKUP_TABLE.MAX_HIGH_CARD + 1):
+        expected = next(rank_class for max_rank, rank_class in bounds if hand_rank <= max_rank)
+        assert Evaluator.get_rank_class(hand_rank) == expected
+        assert Evaluator.rank_to_string(hand_rank) == LOOKUP_TABLE.RANK_CLASS_TO_STRING[expected]
+
+
+def test_vectorized_rank_classes_and_histogram():
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(0)
+    ranks = rng.integers(1, LOOKUP_TABLE.MAX_HIGH_CARD + 1, size=(50, 40))
+    classes = Evaluator.get_rank_classes(ranks)
+    assert classes.shape == ranks.shape
+    assert classes.tolist() == [[Evaluator.get_rank_class(rank) for rank in row] for row in ranks.tolist()]
+    histogram = Evaluator.rank_class_histogram(ranks)
+    assert histogram.tolist() == np.bincount(classes.ravel(), minlength=10).tolist()
+    # 各段的边界和空段
+    edges = np.array(sorted(LOOKUP_TABLE.MAX_TO_RANK_CLASS))
+    assert Evaluator.rank_class_histogram(edges).tolist() == [0] + [1] * 9
+    assert Evaluator.rank_class_histogram(np.array([1, 1])).tolist() == [0, 2] + [0] * 8
+    for bad in ([0], [LOOKUP_TABLE.MAX_HIGH_CARD + 1]):
+        with pytest.raises(ValueError):
+            Evaluator.rank_class_histogram(np.array(bad))
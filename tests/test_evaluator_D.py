@@ -0,0 +1,41 @@
+""" 旧的牌力判断接口与 Cactus-Kev 牌力的一致性 """
+import random
+
+from src.components import Card, Evaluator as RankEvaluator
+from src.gamer.evaluator_D import Evaluator, HandType
+from src.gamer.player import Player
+
+
+def cards(text):
+    return [Card.STR_TO_CARD[token] for token in text.split()]
+
+
+def evaluator(board):
+    board = cards(board)
+    return Evaluator({"flop": board[:3], "turn": board[3:4], "river": board[4:]})
+
+
+def test_evaluate_hand_matches_the_rank():
+    rng = random.Random(3)
+    for _ in range(2000):
+        drawn = rng.sample(Card.CARDS, 7)
+        legacy = Evaluator({"flop": drawn[2:5], "turn": drawn[5:6], "river": drawn[6:]})
+        hand_type, combo = legacy.evaluate_hand(drawn[:2])
+        hand_rank = RankEvaluator.get_hand_rank(drawn[:2], drawn[2:])
+        assert Evaluator.get_hand_score(combo) == Evaluator.get_hand_score(drawn) == hand_rank
+        assert str(hand_type).lower() == RankEvaluator.rank_to_string(hand_rank).lower() or hand_rank == 1
+    assert evaluator("Qs Js Ts 2c 3d").evaluate_hand(cards("As Ks"))[0] == HandType.ROYAL_FLUSH
+    assert evaluator("Qs Js Ts 2c 3d").evaluate_hand(cards("9s Ks"))[0] == HandType.STRAIGHT_FLUSH
+    assert evaluator("Kh Kd As Qc 9d").describe_hand(cards("4h 2c")) == "Pair of Kings, A-Q-9 kickers"
+
+
+def test_find_winners_returns_only_the_best_hands():
+    legacy = evaluator("Ah Kd 7c 7s 2h")
+    players = [Player(name, 100) for name in "abcd"]
+    hands = [cards("Ac 3d"), cards("7h 2c"), cards("As 4d"), cards("Qc Js")]
+    info = [(player, *legacy.evaluate_hand(hand)) for player, hand in zip(players, hands)]
+    assert legacy.find_winners(info) == [players[1]]
+    # 两家都是 A-A-7-7-K, 平分
+    assert legacy.find_winners(info[::2]) == [players[0], players[2]]
+    assert [player for player, _, _ in info] == players
+    assert legacy.find_winners([]) == []
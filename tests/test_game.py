@@ -0,0 +1,61 @@
+""" 无界面模式下的完整牌局 """
+import builtins
+
+from src.components import Street
+from src.dealer import Dealer
+from src.farm import TableFarm
+from src.gamer import BotPlayer, Player, RandomStrategy
+
+
+def no_input(*args):
+    raise AssertionError("headless tables must not call input()")
+
+
+def call_or_check(player, dealer):
+    return None
+
+
+def test_headless_dealer_runs_without_input_or_output(monkeypatch, capsys):
+    monkeypatch.setattr(builtins, "input", no_input)
+    players = [Player(f"p{seat}", 1000) for seat in range(4)]
+    dealer = Dealer(list(players), strategy=call_or_check, seed=1)
+    assert dealer.headless
+    assert dealer.run(30) == 30
+    assert capsys.readouterr().out == ""
+    assert sum(player.money for player in players) == 4000
+
+
+def test_betting_round_goes_through_decide(monkeypatch):
+    monkeypatch.setattr(builtins, "input", no_input)
+    dealer = Dealer([Player(f"p{seat}", 1000) for seat in range(3)], strategy=call_or_check, seed=2)
+    dealer.reset_deck()
+    dealer.set_positions()
+    dealer.deal_preflop()
+    dealer.record_deal()
+    assert dealer.betting_round(Street.PRE_FLOP) is True
+    # 所有人跟注大盲
+    assert dealer.pot_manager.get_total_chips() == 3 * dealer.big_blind
+
+
+
+def test_farm_tables_conserve_chips():
+    strategy = RandomStrategy(seed=7)
+    tables = [[BotPlayer(f"t{table}_{seat}", strategy, 1000) for seat in range(6)] for table in range(8)]
+    dealers = [Dealer(list(players), headless=True, seed=table, table=table)
+               for table, players in enumerate(tables)]
+    stats = TableFarm(dealers, 200).run()
+    assert stats.hands > 0
+    for players in tables:
+        assert sum(player.money for player in players) == 6000
+
+
+def test_farm_matches_a_table_run_alone():
+    def table():
+        return Dealer([BotPlayer(f"b{seat}", RandomStrategy(seed=3), 1000) for seat in range(4)],
+                      headless=True, seed=5)
+
+    alone, farmed = table(), table()
+    alone.run(50)
+    TableFarm([farmed], 50).run()
+    assert [(p.name, p.money) for p in farmed.player_queue] == [(p.name, p.money) for p in alone.player_queue]
+
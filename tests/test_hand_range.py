@@ -0,0 +1,63 @@
+""" 范围写法的解析, 以及范围对抗胜率与逐个组合、逐个公共牌枚举的结果对比 """
+import itertools
+
+import pytest
+
+from src.components import Card, Evaluator, HandRange
+from src.components.helper import Helper
+
+
+@pytest.mark.parametrize("text, size", [("AA", 6), ("QQ+", 18), ("QQ-88", 30), ("AKs", 4), ("AKo", 12),
+                                        ("AK", 16), ("ATs+", 16), ("A5s-A2s", 16), ("AsKs", 1),
+                                        ("QQ+, AKs, A5s-A2s, KQo:0.5", 50)])
+def test_parse_sizes(text, size):
+    assert len(HandRange.parse(text)) == size
+
+
+def test_parse_weights():
+    hand_range = HandRange.parse("KQo:0.5, KQ, KhQd:0")
+    assert len(hand_range) == 15 and hand_range.total_weight() == 15
+    assert hand_range.without([Card.STR_TO_CARD["Ks"]]).total_weight() == 11
+
+
+@pytest.mark.parametrize("text", ["AAs", "AK:2", "AK:x", "AsAs", "ATs-K9s", "QQ-88o", "XY"])
+def test_parse_rejects_malformed_tokens(text):
+    with pytest.raises(ValueError):
+        HandRange.parse(text)
+
+
+def brute_force(ranges, board):
+    first, second = (HandRange.parse(text).without(board) for text in ranges)
+    total = share = 0.
+    for (a, weight_a), (b, weight_b) in itertools.product(first, second):
+        if set(a) & set(b):
+            continue
+        used = set(a) | set(b) | set(board)
+        stock = [card for card in Card.CARDS if card not in used]
+        runouts = list(itertools.combinations(stock, 5 - len(board)))
+        wins = 0.
+        for runout in runouts:
+            rank_a = Evaluator._seven(list(a) + board + list(runout))
+            rank_b = Evaluator._seven(list(b) + board + list(runout))
+            wins += 1. if rank_a < rank_b else .5 if rank_a == rank_b else 0.
+        total += weight_a * weight_b
+        share += weight_a * weight_b * wins / len(runouts)
+    return share / total
+
+
+@pytest.mark.parametrize("ranges, board", [(("AA", "KK"), "Kd 7c 2h"),
+                                           (("QQ+, AKs", "JJ, AQo:0.5"), "Ah 8d 3c 4s")])
+def test_range_equity_matches_brute_force(ranges, board):
+    board = [Card.STR_TO_CARD[text] for text in board.split()]
+    result = Helper(seed=0).range_equity(list(ranges), board)
+    assert result.exact
+    assert result.equity[0] == pytest.approx(brute_force(ranges, board))
+    assert result.equity[0] + result.equity[1] == pytest.approx(1)
+
+
+def test_sampled_range_equity_agrees_with_exact():
+    board = [Card.STR_TO_CARD[text] for text in "Kd 7c 2h".split()]
+    exact = Helper(seed=0).range_equity(["AA, KQs", "KK, 77, AKo"], board)
+    sampled = Helper(seed=0).range_equity(["AA, KQs", "KK, 77, AKo"], board, max_runouts=300)
+    assert exact.exact and not sampled.exact and sampled.trials == 300
+    assert abs(sampled.equity[0] - exact.equity[0]) < 4 * sampled.stderr[0]
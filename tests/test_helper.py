@@ -0,0 +1,136 @@
+""" Helper 的胜率计算 """
+import itertools
+
+import pytest
+
+from src.components import Card, Evaluator, SuitIsomorphism
+from src.components.helper import Helper
+
+
+def cards(text):
+    return [Card.STR_TO_CARD[item] for item in text.split()]
+
+
+def test_equity_converges_and_is_reproducible():
+    hands = [cards("Ah Ad"), cards("Kc Qc")]
+    result = Helper(seed=3, cache_size=0).equity(hands, max_trials=40_000, tolerance=0)
+    assert result.trials == 40_000 and not result.exact
+    assert sum(result.equity) == pytest.approx(1)
+    # 同一个种子的结果完全相同
+    assert Helper(seed=3, cache_size=0).equity(hands, max_trials=40_000, tolerance=0) == result
+    # AA 对 KQs 约 0.83
+    assert abs(result.equity[0] - 0.83) < 5 * result.stderr[0] + 0.01
+
+
+def test_equity_stops_at_tolerance_and_time_limit():
+    hands = [cards("Ah Ad"), cards("Kc Qc")]
+    result = Helper(seed=0, cache_size=0).equity(hands, max_trials=100_000, tolerance=0.01, chunk_size=1000)
+    assert result.trials < 100_000
+    assert 1.96 * max(result.stderr) <= 0.01
+    # 截止时间已过也至少完成一块
+    result = Helper(seed=0, cache_size=0).equity(hands, max_trials=100_000, tolerance=0,
+                                                 time_limit=0, chunk_size=1000)
+    assert result.trials == 1000
+
+
+@pytest.mark.parametrize("max_trials, chunk_size", [(0, 2000), (-5, 2000), (1000, 0)])
+def test_equity_rejects_empty_sampling(max_trials, chunk_size):
+    with pytest.raises(ValueError):
+        Helper(seed=0).equity([cards("Ah Ad"), cards("Kc Qc")], max_trials=max_trials, chunk_size=chunk_size)
+
+
+def brute_force(hands, board):
+    used = set(itertools.chain(*hands, board))
+    stock = [card for card in Card.CARDS if card not in used]
+    shares = [0.] * len(hands)
+    runouts = list(itertools.combinations(stock, 5 - len(board)))
+    for runout in runouts:
+        ranks = [Evaluator._seven(hand + board + list(runout)) for hand in hands]
+        winners = [i for i, rank in enumerate(ranks) if rank == min(ranks)]
+        for i in winners:
+            shares[i] += 1 / len(winners)
+    return [share / len(runouts) for share in shares]
+
+
+@pytest.mark.parametrize("hands, board", [(("Ah Kh", "Qs Qd"), "Jh 7h 2c"),
+                                          (("9c 8c", "As Kd", "7d 7s"), "Tc 6h 2c 3d"),
+                                          (("Ac 5d", "Ad 5c"), "Kh Qh Jh 2s 3s")])
+def test_exact_equity_matches_brute_force(hands, board):
+    hands, board = [cards(hand) for hand in hands], cards(board)
+    result = Helper(cache_size=0).exact_equity(hands, board)
+    assert result.exact and result.stderr == [0.] * len(hands)
+    assert result.equity == pytest.approx(brute_force(hands, board))
+
+
+def test_sampling_agrees_with_exact_equity():
+    hands, board = [cards("Ah Kh"), cards("Qs Qd")], cards("Jh 7h 2c")
+    exact = Helper(cache_size=0).exact_equity(hands, board)
+    sampled = Helper(seed=1, cache_size=0).equity(hands, board, max_trials=20_000, tolerance=0)
+    for i in range(2):
+        assert abs(sampled.equity[i] - exact.equity[i]) < 4 * sampled.stderr[i]
+
+
+def test_results_do_not_depend_on_the_process_count():
+    hands, board = [cards("Ah Kh"), cards("Qs Qd"), cards("9c 9d")], cards("Jh 7h 2c")
+    with Helper(seed=5, processes=1, cache_size=0) as serial, \
+            Helper(seed=5, processes=2, cache_size=0) as parallel:
+        assert parallel.equity(hands, max_trials=12_000, tolerance=0.02, chunk_size=1000) \
+            == serial.equity(hands, max_trials=12_000, tolerance=0.02, chunk_size=1000)
+        assert parallel.exact_equity(hands, board) == serial.exact_equity(hands, board)
+
+
+def test_preflop_table_lookup():
+    assert len(Helper.PREFLOP_CLASSES) == 169
+    assert Helper.hand_class(cards("Ks As")) == "AKs"
+    assert Helper.hand_class(cards("7h 2c")) == "72o"
+    assert Helper.preflop_equity("AA", "KK") == pytest.approx(0.82, abs=0.01)
+    assert Helper.preflop_equity(cards("Qd Qc"), "QQ") == 0.5
+    for first, second in [("AKs", "22"), ("T9s", "AKo"), ("72o", "32o")]:
+        assert Helper.preflop_equity(first, second) + Helper.preflop_equity(second, first) == pytest.approx(1)
+
+
+def test_shipped_preflop_table_uses_the_default_trials(tmp_path):
+    with open(Helper.PREFLOP_TABLE_PATH, "rb") as file:
+        _, _, trials = Helper.PREFLOP_TABLE_HEADER.unpack_from(file.read())
+    assert trials == Helper.PREFLOP_TABLE_TRIALS
+    path = tmp_path / "preflop.bin"
+    path.write_bytes(b"XXXX" + bytes(Helper.PREFLOP_TABLE_HEADER.size))
+    with pytest.raises(ValueError):
+        Helper.load_preflop_table(str(path))
+
+
+def test_canonical_key_ignores_suit_permutations():
+    key = SuitIsomorphism.canonical_key([cards("Ah Kh"), cards("Qs Qd")], cards("Qh Jh 2c"))
+    assert key == SuitIsomorphism.canonical_key([cards("As Ks"), cards("Qh Qc")], cards("Js Qs 2d"))
+    assert key != SuitIsomorphism.canonical_key([cards("As Ks"), cards("Qh Qc")], cards("Qs Js 2s"))
+    # 玩家的顺序不能交换
+    assert key != SuitIsomorphism.canonical_key([cards("Qs Qd"), cards("Ah Kh")], cards("Qh Jh 2c"))
+
+
+def test_cache_hits_isomorphic_queries():
+    helper = Helper(seed=0, cache_size=2)
+    first = helper.exact_equity([cards("Ah Kh"), cards("Qs Qd")], cards("Qh Jh 2c"))
+    second = helper.exact_equity([cards("As Ks"), cards("Qh Qc")], cards("Qs Js 2d"))
+    assert second == first and helper.cache.hits == 1
+    helper.exact_equity([cards("Ah Ad"), cards("Kc Kd")], cards("2h 3h 4h"))
+    helper.exact_equity([cards("Ah Ad"), cards("Kc Qd")], cards("2h 3h 4h"))
+    # 容量为 2, 最早的结果已被淘汰
+    assert len(helper.cache) == 2
+    helper.exact_equity([cards("Ah Kh"), cards("Qs Qd")], cards("Qh Jh 2c"))
+    assert helper.cache.hits == 1
+
+
+def test_cache_keeps_sampled_results_of_different_seeds_apart():
+    hands = [cards("Ah Kh"), cards("Qs Qd")]
+    helper = Helper(seed=0)
+    first = helper.equity(hands, max_trials=4000, tolerance=0, seed=1)
+    other = helper.equity(hands, max_trials=4000, tolerance=0, seed=2)
+    assert other != first
+    assert other == Helper(cache_size=0).equity(hands, max_trials=4000, tolerance=0, seed=2)
+    assert helper.equity(hands, max_trials=4000, tolerance=0, seed=1) == first
+    assert helper.cache.hits == 1
+    # 共用缓存的另一个 Helper 种子不同, 不能命中
+    shared = Helper(seed=9)
+    shared.cache = helper.cache
+    assert shared.equity(hands, max_trials=4000, tolerance=0) \
+        == Helper(seed=9, cache_size=0).equity(hands, max_trials=4000, tolerance=0)
@@ -0,0 +1,63 @@
+""" 牌局历史的事件流和各个 sink """
+import pytest
+
+from src.dealer import Dealer
+from src.gamer import BotPlayer, RandomStrategy
+from src.history import BinarySink, Event, EventSink, EventStream, EventType, JsonlSink, RingBufferSink
+
+
+def record(tmp_path, hands=20, background=True, batch_size=64):
+    """ 一张机器人牌桌的 hands 手牌同时写入三种 sink """
+    ring = RingBufferSink()
+    jsonl, binary = str(tmp_path / "hands.jsonl"), str(tmp_path / "hands.bin")
+    with EventStream([ring, JsonlSink(jsonl), BinarySink(binary)],
+                     batch_size=batch_size, background=background) as events:
+        players = [BotPlayer(f"b{seat}", RandomStrategy(seed=seat), 1000) for seat in range(4)]
+        Dealer(players, headless=True, seed=1, events=events, table=3).run(hands)
+    return list(ring.events), jsonl, binary
+
+
+@pytest.mark.parametrize("background", [True, False])
+def test_sinks_round_trip(tmp_path, background):
+    events, jsonl, binary = record(tmp_path, background=background)
+    assert events[0].type == EventType.HAND and events[0].hand == 1
+    assert {event.hand for event in events} == set(range(1, 21))
+    assert all(event.table == 3 for event in events)
+    assert list(JsonlSink.read(jsonl)) == events
+    assert list(BinarySink.read(binary)) == events
+
+
+def test_background_writing_does_not_change_the_events(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    assert record(tmp_path / "a")[0] == record(tmp_path / "b", background=False, batch_size=1)[0]
+
+
+def test_ring_buffer_keeps_the_latest_events():
+    ring = RingBufferSink(capacity=3)
+    with EventStream([ring], batch_size=2) as events:
+        for hand in range(1, 8):
+            events.emit(Event(hand, EventType.HAND))
+    assert [event.hand for event in ring.events] == [5, 6, 7]
+
+
+class FailingSink(EventSink):
+    def write(self, events):
+        raise OSError("disk full")
+
+
+def test_background_errors_surface_instead_of_deadlocking():
+    events = EventStream([FailingSink()], batch_size=1)
+    with pytest.raises(OSError):
+        # 队列只有64个位置, 后台线程停止消费时这里会永远阻塞
+        for hand in range(1000):
+            events.emit(Event(hand, EventType.HAND))
+    with pytest.raises(OSError):
+        events.close()
+
+
+def test_binary_sink_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"nope")
+    with pytest.raises(ValueError):
+        list(BinarySink.read(str(path)))
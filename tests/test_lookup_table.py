@@ -0,0 +1,46 @@
+""" 查找表的二进制缓存与共享内存 """
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.components import LOOKUP_TABLE
+from src.components.lookup_table import ArrayLookup, LookupTable
+
+
+def test_cache_round_trip(tmp_path):
+    path = str(tmp_path / "table.bin")
+    LOOKUP_TABLE.save(path)
+    table = LookupTable.from_file(path)
+    assert dict(table.flush_lookup) == dict(LOOKUP_TABLE.flush_lookup)
+    assert dict(table.unsuited_lookup) == dict(LOOKUP_TABLE.unsuited_lookup)
+
+
+def test_cache_from_other_generators_is_stale(tmp_path, monkeypatch):
+    path = str(tmp_path / "table.bin")
+    LOOKUP_TABLE.save(path)
+    monkeypatch.setattr(LookupTable, "_fingerprint", LookupTable.fingerprint() ^ 1)
+    with pytest.raises(ValueError):
+        LookupTable.from_file(path)
+
+
+def test_from_shared_matches_the_table():
+    with LOOKUP_TABLE.share() as name:
+        table = LookupTable.from_shared(name)
+        assert isinstance(table.flush_lookup, ArrayLookup)
+        assert dict(table.flush_lookup) == dict(LOOKUP_TABLE.flush_lookup)
+        assert dict(table.unsuited_lookup) == dict(LOOKUP_TABLE.unsuited_lookup)
+        with pytest.raises(KeyError):
+            table.unsuited_lookup[1]
+
+
+def test_independent_process_does_not_unlink_the_block():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = ("from src.components import LOOKUP_TABLE\n"
+              "from src.components.lookup_table import ArrayLookup\n"
+              "assert isinstance(LOOKUP_TABLE.flush_lookup, ArrayLookup)\n")
+    with LOOKUP_TABLE.share() as name:
+        subprocess.run([sys.executable, "-c", script], cwd=root, env=dict(os.environ), check=True)
+        # 子进程退出后共享内存仍然存在
+        assert dict(LookupTable.from_shared(name).flush_lookup) == dict(LOOKUP_TABLE.flush_lookup)
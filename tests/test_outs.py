@@ -0,0 +1,55 @@
+""" 听牌分析与逐张补牌后完整求值的对比 """
+import random
+
+import pytest
+
+from src.components import Card, Evaluator, OutsAnalyzer
+
+
+def cards(text):
+    return [Card.STR_TO_CARD[token] for token in text.split()]
+
+
+@pytest.mark.parametrize("board_size", [3, 4])
+def test_outs_match_a_full_evaluation_of_every_unseen_card(board_size):
+    rng = random.Random(board_size)
+    for _ in range(300):
+        drawn = rng.sample(Card.CARDS, 2 + board_size + 2)
+        hand, board, dead = drawn[:2], drawn[2:2 + board_size], drawn[-2:]
+        report = OutsAnalyzer.analyze(hand, board, dead)
+        current = Evaluator._seven(hand + board)
+        assert report.rank == current and report.rank_class == Evaluator.get_rank_class(current)
+        unseen = [card for card in Card.CARDS if card not in drawn]
+        assert report.unseen == len(unseen)
+        expected = {}
+        for card in unseen:
+            rank_class = Evaluator.get_rank_class(Evaluator._seven(hand + board + [card]))
+            if rank_class < report.rank_class:
+                expected[card] = rank_class
+        assert {card: report.best_class(card) for card in report.outs} == expected
+        assert report.probability == len(expected) / len(unseen)
+
+
+def test_combo_draw_counts_overlapping_outs_once():
+    # 两张红桃凑成同花, 同时也补上两头顺子
+    report = OutsAnalyzer.analyze(cards("9h 8h"), cards("7h 6c 2c Kh"))
+    classes = report.by_class()
+    assert len(classes[4]) == 9 and len(classes[5]) == 8
+    # 5h Th 同时凑成同花和顺子, 6h 2h 同时凑成同花和对子
+    assert sorted(map(str, report.overlapping)) == sorted(map(str, cards("5h Th 6h 2h")))
+    assert report.best_class(Card.STR_TO_CARD["Th"]) == 4
+    assert report.summary().startswith("9 flush outs, 8 straight outs")
+    assert report.summary().endswith("4 overlapping")
+
+
+def test_made_hands_without_outs():
+    report = OutsAnalyzer.analyze(cards("As Ks"), cards("Qs Js Ts"))
+    assert report.rank == 1 and not report.outs
+    assert report.probability == 0. and report.summary() == "no outs"
+
+
+def test_bad_input_is_rejected():
+    with pytest.raises(ValueError):
+        OutsAnalyzer.analyze(cards("As Ks"), cards("Qs Js"))
+    with pytest.raises(ValueError):
+        OutsAnalyzer.analyze(cards("As Ks"), cards("Qs Js Ts"), cards("As"))
@@ -0,0 +1,98 @@
+""" PotManager 的结算与暴力计算的边池对比 """
+import random
+
+import pytest
+
+from src.gamer import PotManager
+
+
+def reference_payouts(contributions, folded, ranks, order):
+    """ 按每个投入层级逐层切分底池, 再合并有资格玩家相同的相邻底池 """
+    live = [p for p in contributions if p not in folded]
+    levels = sorted(set(contributions.values()))
+    top = max(contributions[p] for p in live)
+    top_players = frozenset(p for p in live if contributions[p] == top)
+    pots = []
+    previous = 0
+    for level in levels:
+        amount = sum(min(c, level) - min(c, previous) for c in contributions.values())
+        eligible = frozenset(p for p in live if contributions[p] >= level) or top_players
+        if pots and pots[-1][1] == eligible:
+            pots[-1][0] += amount
+        else:
+            pots.append([amount, eligible])
+        previous = level
+
+    payouts = dict.fromkeys(ranks, 0)
+    for amount, eligible in pots:
+        best = min(ranks[p] for p in eligible)
+        winners = sorted((p for p in eligible if ranks[p] == best), key=order.index)
+        share, odd = divmod(amount, len(winners))
+        for i, player in enumerate(winners):
+            payouts[player] += share + (i < odd)
+    return payouts
+
+
+def random_spot(rng):
+    players = list(range(rng.randint(2, 9)))
+    manager = PotManager()
+    for player in players:
+        # 少量的档位使平局、相同投入和零头筹码经常出现
+        manager.add_bet(player, rng.choice([1, 5, 7, 10, 10, 25, 40, 40, 101]))
+    folded = set(rng.sample(players, rng.randint(0, len(players) - 1)))
+    for player in folded:
+        manager.fold(player)
+    ranks = {p: rng.randint(1, 4) for p in players if p not in folded}
+    order = players[:]
+    rng.shuffle(order)
+    return manager, folded, ranks, order
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_settle_matches_reference(seed):
+    rng = random.Random(seed)
+    for _ in range(2000):
+        manager, folded, ranks, order = random_spot(rng)
+        expected = reference_payouts(manager.contributions, folded, ranks, order)
+        assert manager.settle(ranks, order) == expected
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_resolve_pots_conserve_chips(seed):
+    rng = random.Random(seed)
+    for _ in range(2000):
+        manager, folded, ranks, order = random_spot(rng)
+        results = manager.resolve(ranks, order)
+        assert [r.amount for r in results] == [pot.amount for pot in manager.pots]
+        assert sum(r.amount for r in results) == manager.get_total_chips()
+        for result in results:
+            assert sum(result.splits.values()) == result.amount
+            assert not result.eligible_players & folded
+            best = min(ranks[p] for p in result.eligible_players)
+            assert set(result.winners) == {p for p in result.eligible_players if ranks[p] == best}
+
+
+def test_folded_dead_money_goes_to_top_pot():
+    manager = PotManager()
+    manager.add_bet("a", 100)
+    manager.add_bet("b", 50)
+    manager.add_bet("c", 200)
+    manager.fold("c")
+    results = manager.resolve({"a": 5, "b": 1}, ["a", "b", "c"])
+    # 主池 50*3, 边池 a 的 50 加上 c 超出 a 的 100 死钱
+    assert [(r.amount, r.eligible_players) for r in results] == [(150, {"a", "b"}), (200, {"a"})]
+    assert manager.settle({"a": 5, "b": 1}, ["a", "b", "c"]) == {"a": 200, "b": 150}
+
+
+def test_odd_chips_follow_seat_order():
+    manager = PotManager()
+    for player, chips in (("a", 5), ("b", 5), ("c", 5), ("d", 6)):
+        manager.add_bet(player, chips)
+    manager.fold("d")
+    payouts = manager.settle({"a": 3, "b": 3, "c": 3}, ["c", "a", "b", "d"])
+    assert payouts == {"c": 7, "a": 7, "b": 7}
+    manager.reset_pot()
+    for player, chips in (("a", 5), ("b", 5), ("c", 7)):
+        manager.add_bet(player, chips)
+    manager.fold("c")
+    assert manager.settle({"a": 2, "b": 2}, ["b", "a", "c"]) == {"b": 9, "a": 8}
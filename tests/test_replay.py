@@ -0,0 +1,51 @@
+""" 确定性回放: 种子 + 下注量重现整张牌桌 """
+import pytest
+
+from src.dealer import Dealer
+from src.gamer import BotPlayer, RandomStrategy
+from src.history import EventStream, RingBufferSink
+from src.replay import Replay, ReplayError
+
+
+def table(seed=8, events=None):
+    players = [BotPlayer(f"b{seat}", RandomStrategy(fold=0.2, raise_=0.3, seed=seat), 500) for seat in range(5)]
+    return Dealer(players, headless=True, seed=seed, events=events, table=2)
+
+
+def chips(dealer):
+    return sorted((player.name, player.money) for player in dealer.player_queue)
+
+
+def test_replay_reproduces_the_table():
+    ring = RingBufferSink()
+    with EventStream([ring], background=False) as events:
+        original = table(events=events)
+        # 一直进行到只剩一位玩家, 记录的下注量恰好用完
+        log = Replay.record(original)
+    replayed = RingBufferSink()
+    with EventStream([replayed], background=False) as events:
+        dealer = Replay.run(log, events=events)
+    assert dealer.hand_id == original.hand_id > 1 and dealer.table == 2
+    assert chips(dealer) == chips(original)
+    assert list(replayed.events) == list(ring.events)
+
+
+def test_replay_from_events_matches_the_recorded_actions():
+    ring = RingBufferSink()
+    original = table(events=EventStream([ring], background=False))
+    log = Replay.record(original, 40)
+    original.events.close()
+    actions = Replay.actions_from_events(ring.events)
+    assert len(actions) == len(log.actions)
+    assert chips(Replay.run(log._replace(actions=actions), hands=40)) == chips(original)
+
+
+def test_replay_rejects_a_log_that_does_not_fit():
+    log = Replay.record(table())
+    assert Replay.run(log).hand_id > 10
+    with pytest.raises(ReplayError):
+        Replay.run(log._replace(actions=log.actions[:-1]))
+    with pytest.raises(ReplayError):
+        Replay.run(log._replace(actions=log.actions + [None]))
+    # 只重放一部分手牌时不要求用完
+    assert Replay.run(log, hands=10).hand_id == 10
@@ -0,0 +1,114 @@
+""" 牌桌服务: 远程玩家的超时、断线和过期回复 """
+import asyncio
+
+from src.components import Action, Move
+from src.dealer import Dealer
+from src.gamer import BotPlayer, RemotePlayer, Strategy
+from src.history import ACTIONS, EventStream, EventType, RingBufferSink
+from src.server import Connection, LocalClient, TableServer
+
+
+class AlwaysCall(Strategy):
+    def decide(self, state):
+        return Move(Action.CHECK) if state.to_call == 0 else Move(Action.CALL)
+
+
+class SilentClient(LocalClient):
+    """ 入座后从不回复 """
+
+    async def play(self) -> dict:
+        connection = Connection(*await asyncio.open_connection(self.host, self.port))
+        try:
+            await connection.send({"type": "join", "table": self.table, "name": self.name})
+            while (message := await connection.receive())["type"] == "act":
+                pass
+            return message
+        finally:
+            await connection.close()
+
+
+class DisconnectingClient(LocalClient):
+    """ 收到第一次行动请求时断开连接 """
+
+    async def play(self) -> dict:
+        connection = Connection(*await asyncio.open_connection(self.host, self.port))
+        await connection.send({"type": "join", "table": self.table, "name": self.name})
+        message = await connection.receive()
+        await connection.close()
+        return message
+
+
+class StaleClient(LocalClient):
+    """ 每次先回复一个过期序号的弃牌, 再用正确的序号行动 """
+
+    async def play(self) -> dict:
+        connection = Connection(*await asyncio.open_connection(self.host, self.port))
+        try:
+            await connection.send({"type": "join", "table": self.table, "name": self.name})
+            while (message := await connection.receive())["type"] == "act":
+                await connection.send({"type": "move", "seq": message["seq"] - 1, "action": "Fold"})
+                await connection.send({"type": "move", "seq": message["seq"], "action": "Call"})
+                self.moves += 1
+            return message
+        finally:
+            await connection.close()
+
+
+def play(client_type, hands=6, action_timeout=5.):
+    """ 两个跟注机器人和一个远程座位打 hands 手牌, 返回服务端结果、客户端、远程座位的行动和摊牌 """
+    sink = RingBufferSink()
+    events = EventStream([sink], background=False)
+    players = [BotPlayer("bot1", AlwaysCall(), 1000), BotPlayer("bot2", AlwaysCall(), 1000),
+               RemotePlayer("remote", 1000)]
+    dealer = Dealer(players, seed=11, events=events)
+
+    async def main():
+        server = TableServer(action_timeout=action_timeout, join_timeout=5.)
+        table = server.add_table("t", dealer, hands)
+        port = await server.start()
+        client = client_type("t", "remote", AlwaysCall(), port=port)
+        played, last = await asyncio.gather(server.serve(), client.play())
+        return played, last, client, table
+
+    played, last, client, table = asyncio.run(main())
+    events.close()
+    seats = {(e.hand, e.seat): e.name for e in sink.events if e.type == EventType.SEAT}
+    moves = [(e.street, ACTIONS[e.action]) for e in sink.events
+             if e.type == EventType.MOVE and seats[e.hand, e.seat] == "remote"]
+    # 远程座位参加摊牌的手牌
+    showdowns = {e.hand for e in sink.events
+                 if e.type == EventType.SHOWDOWN and seats[e.hand, e.seat] == "remote"}
+    return played, last, client, table, moves, showdowns
+
+
+def test_local_client_plays_a_table():
+    played, last, client, _, moves, showdowns = play(LocalClient)
+    assert played == {"t": 6} and last["type"] == "end"
+    assert client.moves == len(moves) > 0
+    assert Action.FOLD not in {action for _, action in moves}
+    assert len(showdowns) == 6
+
+
+def test_timeout_checks_when_free_and_folds_otherwise():
+    played, last, _, table, moves, showdowns = play(SilentClient, action_timeout=0.05)
+    assert played == {"t": 6} and last["type"] == "end"
+    actions = {action for _, action in moves}
+    # 面对下注时超时弃牌; 大盲的option和无人下注时超时只能是check, 牌局因此打到摊牌
+    assert Action.FOLD in actions and actions - {Action.FOLD}
+    assert showdowns
+
+
+def test_disconnect_checks_when_free_and_folds_otherwise():
+    played, last, _, table, moves, showdowns = play(DisconnectingClient)
+    assert played == {"t": 6} and last["type"] == "act"
+    assert not table.connections
+    assert Action.FOLD in {action for _, action in moves}
+    assert showdowns
+
+
+def test_stale_replies_are_ignored():
+    played, last, client, _, moves, showdowns = play(StaleClient)
+    assert played == {"t": 6} and last["type"] == "end"
+    assert client.moves == len(moves) > 0
+    assert Action.FOLD not in {action for _, action in moves}
+    assert len(showdowns) == 6
@@ -0,0 +1,141 @@
+""" 列式分块存储的写入、认领与查询 """
+import os
+
+import pytest
+
+from src.components import Action, Position, Street
+from src.dealer import Dealer
+from src.farm import TableFarm
+from src.gamer import BotPlayer, RandomStrategy
+from src.history import Event, EventStream, EventType, RingBufferSink
+from src.storage import ColumnarSink, EventPattern, HandStore
+
+np = pytest.importorskip("numpy")
+
+
+def bots(prefix, seats=4, seed=0):
+    return [BotPlayer(f"{prefix}{seat}", RandomStrategy(seed=seed + seat), 1000) for seat in range(seats)]
+
+
+def record(directory, hands=40, chunk_rows=200, seed=1):
+    """ 一张牌桌的 hands 手牌写入分块目录, 同时返回内存中的事件 """
+    ring = RingBufferSink()
+    with EventStream([ring, ColumnarSink(str(directory), chunk_rows)], batch_size=50) as events:
+        Dealer(bots("b", seed=seed), headless=True, seed=seed, events=events).run(hands)
+    by_hand = {}
+    for event in ring.events:
+        by_hand.setdefault(event.hand, []).append(event)
+    return by_hand
+
+
+def test_chunks_round_trip(tmp_path):
+    by_hand = record(tmp_path)
+    with HandStore(str(tmp_path)) as store:
+        assert len(store.chunks) > 1
+        assert len(store) == sum(map(len, by_hand.values()))
+        for hand, events in by_hand.items():
+            assert store.events(hand) == events
+        assert [events[0].hand for events in store.iter_hands([3, 1, 2])] == [1, 2, 3]
+
+
+def test_select_matches_a_scan(tmp_path):
+    by_hand = record(tmp_path, hands=80)
+
+    def scan(*patterns):
+        def count(events, pattern):
+            return sum(all(getattr(event, name) == value for name, value in pattern.codes().items())
+                       for event in events)
+        return [hand for hand, events in sorted(by_hand.items())
+                if all(count(events, pattern) >= pattern.min_count for pattern in patterns)]
+
+    queries = [(EventPattern(EventType.MOVE, street=Street.PRE_FLOP, action=Action.RAISE),),
+               (EventPattern(EventType.SHOWDOWN, min_count=2),),
+               (EventPattern(EventType.MOVE, Position.BTN, Street.PRE_FLOP, Action.CALL),
+                EventPattern(EventType.SHOWDOWN, Position.BTN)),
+               (EventPattern(EventType.MOVE, action=Action.FOLD, min_count=3),)]
+    with HandStore(str(tmp_path)) as store:
+        for patterns in queries:
+            expected = scan(*patterns)
+            assert expected and store.select(*patterns) == expected
+        assert store.select() == sorted(by_hand)
+
+
+def test_writers_sharing_a_directory_get_distinct_hands(tmp_path):
+    first = record(tmp_path, hands=30, seed=1)
+    second = record(tmp_path, hands=30, seed=2)
+    with HandStore(str(tmp_path)) as store:
+        assert store.select() == list(range(1, 61))
+        # 第二个写入者的手牌接在第一个之后重新编号
+        assert store.events(31) == [event._replace(hand=31) for event in second[1]]
+        assert store.events(1) == first[1]
+
+
+def test_filesystems_without_hard_links(tmp_path, monkeypatch):
+    def no_link(source, target):
+        raise PermissionError("hard links are not supported")
+
+    monkeypatch.setattr(os, "link", no_link)
+    by_hand = record(tmp_path)
+    record(tmp_path, hands=10, seed=2)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+    with HandStore(str(tmp_path)) as store:
+        assert store.select() == list(range(1, 51))
+        assert store.events(40) == by_hand[40]
+
+
+def test_claimed_chunks_are_skipped_by_readers(tmp_path, monkeypatch):
+    record(tmp_path, hands=5)
+    claimed = tmp_path / "chunk-999999.thc"
+    claimed.touch()
+    assert ColumnarSink.last_hand(str(claimed)) is None
+    with HandStore(str(tmp_path)) as store:
+        assert store.select() == [1, 2, 3, 4, 5]
+    # 写入者等待认领者写完; 认领者崩溃时超时报错, 不会猜测编号
+    monkeypatch.setattr(ColumnarSink, "CLAIM_TIMEOUT", 0.05)
+    with pytest.raises(OSError):
+        record(tmp_path, hands=1)
+
+
+def test_close_releases_the_chunks(tmp_path):
+    record(tmp_path)
+    store = HandStore(str(tmp_path))
+    chunks = store.chunks
+    store.close()
+    assert not store.chunks and all(chunk._mmap.closed for chunk in chunks)
+    for name in os.listdir(tmp_path):
+        os.remove(tmp_path / name)
+
+
+def test_interleaved_tables_keep_their_hands_apart(tmp_path):
+    ring = RingBufferSink()
+    with EventStream([ring, ColumnarSink(str(tmp_path), 300)], batch_size=30) as events:
+        dealers = [Dealer(bots(f"t{table}_", seed=table), headless=True, seed=table, events=events, table=table)
+                   for table in range(4)]
+        TableFarm(dealers, 25).run()
+    expected = {}
+    for event in ring.events:
+        expected.setdefault((event.table, event.hand), []).append(event)
+    with HandStore(str(tmp_path)) as store:
+        hands = store.select()
+        assert hands == list(range(1, len(expected) + 1))
+        # 每张牌桌的手牌按顺序存放, 按牌桌数出的序号就是该牌桌自己的手牌编号
+        counters = dict.fromkeys(range(4), 0)
+        for events in store.iter_hands(hands):
+            table = events[0].table
+            counters[table] += 1
+            assert [event._replace(hand=counters[table]) for event in events] == expected[table, counters[table]]
+        assert counters == dict.fromkeys(range(4), 25)
+
+
+def test_tables_sharing_an_id_are_rejected(tmp_path):
+    sink = ColumnarSink(str(tmp_path))
+    sink.write([Event(1, EventType.HAND), Event(1, EventType.SEAT, 0)])
+    with pytest.raises(ValueError):
+        sink.write([Event(1, EventType.HAND)])
+    with pytest.raises(ValueError):
+        sink.write([Event(7, EventType.MOVE, 0)])
+    events = EventStream([])
+    dealers = [Dealer(bots("b", seats=2), headless=True, events=events) for _ in range(2)]
+    with pytest.raises(ValueError):
+        TableFarm(dealers, 1)
+    events.close()
@@ -0,0 +1,74 @@
+""" 机器人策略接口与 Player.bet 的下注量约定 """
+import pytest
+
+from src.components import Action, Move, Position, Street
+from src.dealer import Dealer
+from src.gamer import BotPlayer, GameState, Player, RandomStrategy, Strategy
+
+
+def state(current_bet=0, bet=0, money=1000, min_raise=20):
+    return GameState(street=Street.FLOP, hand=(), board=(), position=Position(0), money=money, bet=bet,
+                     current_bet=current_bet, min_raise=min_raise, pot=100, players=2, big_blind=20)
+
+
+def bet(move, current_bet=0, bet=0, money=1000, min_raise=20):
+    """ 把 move 按 to_amount 交给一个已经下注 bet 的玩家 """
+    player = Player("p", money + bet)
+    player.set_hand([])
+    if bet:
+        player.bet(Street.PRE_FLOP, bet, 0, 0)
+    amount = Strategy.to_amount(move, state(current_bet, bet, money, min_raise))
+    return player.bet(Street.PRE_FLOP, amount, current_bet, min_raise)
+
+
+def test_strategy_without_decide_fails_on_construction():
+    class Incomplete(Strategy):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+@pytest.mark.parametrize("move, current_bet, bet_before, expected", [
+    (Move(Action.FOLD), 40, 0, Action.FOLD),
+    (Move(Action.CHECK), 0, 0, Action.CHECK),
+    # 大盲的option: 已经跟到了当前下注, check 不能变成fold
+    (Move(Action.CHECK), 20, 20, Action.CALL),
+    (Move(Action.CALL), 40, 0, Action.CALL),
+    (Move(Action.RAISE, 100), 40, 0, Action.RAISE),
+    (Move(Action.ALL_IN), 40, 0, Action.ALL_IN),
+])
+def test_to_amount_gives_the_intended_action(move, current_bet, bet_before, expected):
+    assert bet(move, current_bet, bet_before).action == expected
+
+
+def test_all_in_short_of_a_raise_is_still_all_in():
+    move = bet(Move(Action.ALL_IN), current_bet=40, money=50, min_raise=40)
+    assert move.action == Action.ALL_IN and move.amount == 50
+
+
+class AlwaysCheck(Strategy):
+    def __init__(self):
+        self.states = []
+
+    def decide(self, state):
+        self.states.append(state)
+        return Move(Action.CHECK) if state.to_call == 0 else Move(Action.CALL)
+
+
+def test_bot_players_decide_from_game_state():
+    strategy = AlwaysCheck()
+    players = [BotPlayer(f"b{seat}", strategy, 1000) for seat in range(3)]
+    dealer = Dealer(list(players), headless=True, seed=4)
+    assert dealer.run(5) == 5
+    assert strategy.states and all(len(s.hand) == 2 for s in strategy.states)
+    # 没有人弃牌, 每手牌都摊牌
+    assert sum(player.money for player in players) == 3000
+    assert not any(player.action == Action.FOLD for player in players)
+
+
+def test_decide_batch_defaults_to_decide():
+    states = [state(current_bet=c) for c in (0, 20, 40, 80)]
+    single = RandomStrategy(seed=1)
+    batch = RandomStrategy(seed=1).decide_batch(states)
+    assert [(m.action, m.amount) for m in batch] == [(m.action, m.amount) for m in map(single.decide, states)]
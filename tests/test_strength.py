@@ -0,0 +1,52 @@
+""" 7张牌的牌力频率表和 HS/PPot/NPot 与暴力枚举的对比 """
+import itertools
+import math
+
+import pytest
+
+from src.components import Card, Evaluator, HandStrength
+
+
+def cards(text):
+    return [Card.STR_TO_CARD[item] for item in text.split()]
+
+
+def brute_force(hand, board):
+    used = set(hand + board)
+    stock = [card for card in Card.CARDS if card not in used]
+    hero = Evaluator._seven(hand + board)
+    now = [0, 0, 0]
+    hp = [[0] * 3 for _ in range(3)]
+    for opponent in itertools.combinations(stock, 2):
+        current = Evaluator._seven(list(opponent) + board)
+        state = 0 if current > hero else 1 if current == hero else 2
+        now[state] += 1
+        rest = [card for card in stock if card not in opponent]
+        for runout in itertools.combinations(rest, 5 - len(board)):
+            mine = Evaluator._seven(hand + board + list(runout))
+            theirs = Evaluator._seven(list(opponent) + board + list(runout))
+            hp[state][0 if theirs > mine else 1 if theirs == mine else 2] += 1
+    totals = [sum(row) for row in hp]
+    hs = (now[0] + now[1] / 2) / sum(now)
+    ppot = (hp[2][0] + hp[2][1] / 2 + hp[1][0] / 2) / (totals[2] + totals[1] / 2)
+    npot = (hp[0][2] + hp[1][2] / 2 + hp[0][1] / 2) / (totals[0] + totals[1] / 2)
+    return hs, ppot, npot
+
+
+def test_rank_frequencies_match_known_distribution():
+    frequencies = HandStrength.rank_frequencies()
+    assert sum(frequencies) == math.comb(52, 7)
+    by_class = [0] * 10
+    for hand_rank in range(1, len(frequencies)):
+        by_class[Evaluator.get_rank_class(hand_rank)] += frequencies[hand_rank]
+    assert by_class[1:] == [41584, 224848, 3473184, 4047644, 6180020,
+                            6461620, 31433400, 58627800, 23294460]
+    assert HandStrength.percentile(7462) == 0
+
+
+@pytest.mark.parametrize("hand, board", [("Ah Kh", "Qh 7c 2h 9d"),
+                                         ("9s 8s", "Ts 7d 2c Kh"),
+                                         ("Ac Ad", "Kc 8d 3s 2h 5c")])
+def test_strength_matches_brute_force(hand, board):
+    result = HandStrength().calculate(cards(hand), cards(board))
+    assert (result.hs, result.ppot, result.npot) == pytest.approx(brute_force(cards(hand), cards(board)))